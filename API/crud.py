@@ -192,7 +192,7 @@ def get_ic_weights_by_scheme_id(
         # Construct weights dictionary and validate ImpactCategoryID and ICWeight schema
         try:
             weights_dict = {
-                schemas.ImpactCategoryID(result.ic_id): schemas.ICWeight(weight=result.ic_weight)
+                schemas.ImpactCategoryID.get(result.ic_id): schemas.ICWeight(weight=result.ic_weight)
                 for result in results
             }
         except pydantic.ValidationError as validation_error:
@@ -8,12 +8,23 @@ Created for FIT API refactoring - Phase 1 optimization.
 """
 
 from typing import Dict, List, Tuple, Set
+from sqlalchemy import tuple_
 from sqlmodel import Session, select, func
 from sqlalchemy.exc import SQLAlchemyError
 
 from API import models, schemas, exceptions
 
 
+def _item_keys(items: List[Tuple[schemas.ItemID, schemas.GeoID]]) -> List[Tuple[str, int]]:
+    """
+    Unique (item_id, geo_id) value pairs of the requested items, in request order.
+
+    Matching the pairs as row values (item_id, geo_id) IN (...) only fetches the requested
+    combinations; separate IN lists on both columns would also return every cross combination.
+    """
+    return list(dict.fromkeys((item[0].get_value(), item[1].get_value()) for item in items))
+
+
 def bulk_fetch_proxy_flags(
     session: Session, 
     items: List[Tuple[schemas.ItemID, schemas.GeoID]]
@@ -37,9 +48,7 @@ def bulk_fetch_proxy_flags(
         return {}
         
     try:
-        # Extract item_ids and geo_ids for the query
-        item_ids = [item[0].get_value() for item in items]
-        geo_ids = [item[1].get_value() for item in items]
+        item_keys = _item_keys(items)
         
         # Single query to fetch all proxy flags
         query = select(
@@ -47,8 +56,7 @@ def bulk_fetch_proxy_flags(
             models.MetaData.geo_id,
             models.MetaData.proxy_flag
         ).where(
-            (models.MetaData.item_id.in_(item_ids)) &
-            (models.MetaData.geo_id.in_(geo_ids))
+            tuple_(models.MetaData.item_id, models.MetaData.geo_id).in_(item_keys)
         )
         
         results = session.exec(query).all()
@@ -59,7 +67,7 @@ def bulk_fetch_proxy_flags(
             proxy_dict[(item_id, geo_id)] = proxy_flag
             
         # Verify all requested items were found
-        requested_keys = {(item[0].get_value(), item[1].get_value()) for item in items}
+        requested_keys = set(item_keys)
         found_keys = set(proxy_dict.keys())
         missing_keys = requested_keys - found_keys
         
@@ -86,9 +94,12 @@ def bulk_fetch_weighted_results(
     scheme_id: schemas.WeightingSchemeID,
     impact_categories: List[schemas.ImpactCategoryID],
     life_cycle_stages: List[schemas.LCStageID]
-) -> Dict[Tuple[int, int], Dict[Tuple[int, int], schemas.LCIAValue]]:
+) -> Dict[Tuple[int, int], Dict[Tuple[int, int], float]]:
     """
     Fetch weighted results for multiple items in a single database query.
+
+    The weighted values are returned as plain floats; they are only summed per stage and
+    impact category, so wrapping every row in an LCIAValue would be wasted validation.
     
     Args:
         session: Database session
@@ -98,7 +109,7 @@ def bulk_fetch_weighted_results(
         life_cycle_stages: List of life cycle stage IDs
         
     Returns:
-        Dict mapping (item_id, geo_id) -> {(ic_id, lc_stage_id) -> LCIAValue}
+        Dict mapping (item_id, geo_id) -> {(ic_id, lc_stage_id) -> weighted value}
         
     Raises:
         exceptions.MissingLCIAValueError: If required combinations are missing
@@ -110,8 +121,7 @@ def bulk_fetch_weighted_results(
         
     try:
         # Extract values for query
-        item_ids = [item[0].get_value() for item in items]
-        geo_ids = [item[1].get_value() for item in items]
+        item_keys = _item_keys(items)
         ic_ids = [ic.get_value() for ic in impact_categories]
         lc_stage_ids = [lc.get_value() for lc in life_cycle_stages]
         
@@ -123,24 +133,23 @@ def bulk_fetch_weighted_results(
             models.WeightedResults.lc_stage_id,
             models.WeightedResults.weighted_value
         ).where(
-            (models.WeightedResults.item_id.in_(item_ids)) &
-            (models.WeightedResults.geo_id.in_(geo_ids)) &
+            tuple_(models.WeightedResults.item_id, models.WeightedResults.geo_id).in_(item_keys) &
             (models.WeightedResults.scheme_id == scheme_id.get_value()) &
             (models.WeightedResults.ic_id.in_(ic_ids)) &
             (models.WeightedResults.lc_stage_id.in_(lc_stage_ids))
         )
         
+        # fetchall() is the fastest way to drain a SQLite cursor; streaming with yield_per fetches in
+        # smaller batches and was measured slower for these result sizes
         results = session.exec(query).all()
         
-        # Organize results by item
-        weighted_dict = {}
+        # Organize results by item; the row-value IN filter only returns requested items
+        weighted_dict = {item_key: {} for item_key in item_keys}
         for item_id, geo_id, ic_id, lc_stage_id, weighted_value in results:
-            item_key = (item_id, geo_id)
-            if item_key not in weighted_dict:
-                weighted_dict[item_key] = {}
-            
-            combination_key = (ic_id, lc_stage_id)
-            weighted_dict[item_key][combination_key] = schemas.LCIAValue(weighted_value)
+            if weighted_value < 0:
+                raise ValueError(f"Negative weighted value {weighted_value} for item_id: {item_id}, geo_id: {geo_id}, "
+                                 f"ic_id: {ic_id}, lc_stage_id: {lc_stage_id}")
+            weighted_dict[(item_id, geo_id)][(ic_id, lc_stage_id)] = weighted_value
             
         # Generate the same expected combinations as the original code
         # This properly handles IC 17 only having stage 1
@@ -153,11 +162,8 @@ def bulk_fetch_weighted_results(
                     expected_combinations.add((ic.get_value(), lc.get_value()))
         
         missing_errors = []
-        for item in items:
-            item_key = (item[0].get_value(), item[1].get_value())
-            item_results = weighted_dict.get(item_key, {})
-            found_combinations = set(item_results.keys())
-            missing_combinations = expected_combinations - found_combinations
+        for item_key in item_keys:
+            missing_combinations = expected_combinations - weighted_dict[item_key].keys()
             
             if missing_combinations:
                 for ic_id, lc_id in missing_combinations:
@@ -213,9 +219,7 @@ def bulk_fetch_single_scores(
         return {}
         
     try:
-        # Extract values for query
-        item_ids = [item[0].get_value() for item in items]
-        geo_ids = [item[1].get_value() for item in items]
+        item_keys = _item_keys(items)
         
         # Single bulk query for all single scores
         query = select(
@@ -223,8 +227,7 @@ def bulk_fetch_single_scores(
             models.SingleScores.geo_id,
             models.SingleScores.single_score
         ).where(
-            (models.SingleScores.item_id.in_(item_ids)) &
-            (models.SingleScores.geo_id.in_(geo_ids)) &
+            tuple_(models.SingleScores.item_id, models.SingleScores.geo_id).in_(item_keys) &
             (models.SingleScores.scheme_id == scheme_id.get_value())
         )
         
@@ -236,7 +239,7 @@ def bulk_fetch_single_scores(
             score_dict[(item_id, geo_id)] = schemas.LCIAValue(single_score)
             
         # Verify all requested items were found
-        requested_keys = {(item[0].get_value(), item[1].get_value()) for item in items}
+        requested_keys = set(item_keys)
         found_keys = set(score_dict.keys())
         missing_keys = requested_keys - found_keys
         
@@ -334,14 +337,14 @@ def bulk_fetch_min_max_values(
         ic_mins = {}
         ic_maxs = {}
         for ic_id, min_val, max_val in ic_results:
-            ic_mins[schemas.ImpactCategoryID(ic_id)] = schemas.LCIAValue(min_val if min_val is not None else 0.0)
-            ic_maxs[schemas.ImpactCategoryID(ic_id)] = schemas.LCIAValue(max_val if max_val is not None else 0.0)
+            ic_mins[schemas.ImpactCategoryID.get(ic_id)] = schemas.LCIAValue(min_val if min_val is not None else 0.0)
+            ic_maxs[schemas.ImpactCategoryID.get(ic_id)] = schemas.LCIAValue(max_val if max_val is not None else 0.0)
             
         lc_mins = {}
         lc_maxs = {}
         for lc_id, min_val, max_val in lc_results:
-            lc_mins[schemas.LCStageID(lc_id)] = schemas.LCIAValue(min_val if min_val is not None else 0.0)
-            lc_maxs[schemas.LCStageID(lc_id)] = schemas.LCIAValue(max_val if max_val is not None else 0.0)
+            lc_mins[schemas.LCStageID.get(lc_id)] = schemas.LCIAValue(min_val if min_val is not None else 0.0)
+            lc_maxs[schemas.LCStageID.get(lc_id)] = schemas.LCIAValue(max_val if max_val is not None else 0.0)
         
         # We need to get single score min/max as well to match the original schema
         # For now, let's add placeholder values - this should be added properly
@@ -414,7 +417,7 @@ def bulk_fetch_names(
             
             stage_results = session.exec(stage_query).all()
             for lc_stage_id, lc_name in stage_results:
-                stage_names[schemas.LCStageID(lc_stage_id)] = lc_name
+                stage_names[schemas.LCStageID.get(lc_stage_id)] = lc_name
                 
         # Bulk fetch impact category names if any requested
         if impact_category_ids:
@@ -428,11 +431,50 @@ def bulk_fetch_names(
             
             ic_results = session.exec(ic_query).all()
             for ic_id, ic_name in ic_results:
-                ic_names[schemas.ImpactCategoryID(ic_id)] = ic_name
+                ic_names[schemas.ImpactCategoryID.get(ic_id)] = ic_name
                 
         return stage_names, ic_names
         
     except SQLAlchemyError as db_error:
         raise SQLAlchemyError(f"Database error in bulk_fetch_names: {db_error}") from db_error
     except Exception as general_exception:
-        raise exceptions.UnknownError(f"Error in bulk_fetch_names: {general_exception}") from general_exception
\ No newline at end of file
+        raise exceptions.UnknownError(f"Error in bulk_fetch_names: {general_exception}") from general_exception
+
+
+def bulk_fetch_geo_ids(session: Session, country_acronyms: Set[str]) -> Dict[str, schemas.GeoID]:
+    """
+    Fetch the geo IDs of multiple country acronyms in a single database query.
+
+    Args:
+        session: Database session
+        country_acronyms: Set of 3-letter country acronyms (geo_shorthand_3)
+
+    Returns:
+        Dict mapping country_acronym -> GeoID; acronyms without a geography are left out
+
+    Raises:
+        SQLAlchemyError: If database error occurs
+        exceptions.UnknownError: For unexpected errors
+    """
+    if not country_acronyms:
+        return {}
+
+    try:
+        query = select(
+            models.Geographies.geo_shorthand_3,
+            models.Geographies.geo_id
+        ).where(
+            models.Geographies.geo_shorthand_3.in_(country_acronyms)
+        )
+
+        geo_ids = {}
+        for country_acronym, geo_id in session.exec(query).all():
+            # Keep the first match, like crud.get_geoid_by_country_acronym
+            if country_acronym not in geo_ids:
+                geo_ids[country_acronym] = schemas.GeoID.get(geo_id)
+        return geo_ids
+
+    except SQLAlchemyError as db_error:
+        raise SQLAlchemyError(f"Database error in bulk_fetch_geo_ids: {db_error}") from db_error
+    except Exception as general_exception:
+        raise exceptions.UnknownError(f"Error in bulk_fetch_geo_ids: {general_exception}") from general_exception
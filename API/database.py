@@ -6,6 +6,7 @@ It includes functions to create the database and tables individually,
 and to get a session.
 """
 import logging
+from functools import lru_cache
 
 from sqlmodel import SQLModel, create_engine, Session, select
 from sqlalchemy import inspect, func
@@ -17,7 +18,12 @@ from API import models
 logger = logging.getLogger('uvicorn')
 
 
+@lru_cache
 def get_engine():
+    """
+    Return the cached engine. This ensures the connection pool is only created once and reused across
+    requests, and lets per-engine caches such as the min/max values outlive a single request.
+    """
     try:
         # Directly instantiate the DatabaseConfig class
         config_instance = config.DatabaseConfig()
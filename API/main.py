@@ -14,6 +14,7 @@ from fastapi import (
     Query,
 )
 from fastapi.openapi.utils import get_openapi
+from fastapi.responses import JSONResponse
 from sqlmodel import Session
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from typing import Optional
@@ -444,7 +445,10 @@ async def calculate_recipe(
     ```
     """
     try:
-        return await calculate_recipe_optimized(data, session)
+        output_data = await calculate_recipe_optimized(data, session)
+        # OutputData serializes itself into the response layout, so hand that dict straight to the response instead
+        # of letting FastAPI re-validate and re-encode it against response_model, which only documents the schema
+        return JSONResponse(content=output_data.model_dump())
 
     except exceptions.InvalidItemCountryAcronymFormatError as custom_error:
         raise HTTPException(status_code=400, detail=f"Invalid country acronym: {custom_error}")
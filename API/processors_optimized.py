@@ -7,7 +7,11 @@ results while using efficient bulk database queries instead of N+1 patterns.
 Created for FIT API refactoring - Phase 2 optimization.
 """
 
-from typing import Dict, List, Set, Tuple
+import math
+import weakref
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+from pydantic import ValidationError
+from sqlalchemy.engine import Engine
 from sqlmodel import Session
 
 from API import schemas, exceptions, processors
@@ -16,7 +20,18 @@ from API.crud_optimizations import (
     bulk_fetch_weighted_results, 
     bulk_fetch_single_scores,
     bulk_fetch_min_max_values,
-    bulk_fetch_names
+    bulk_fetch_names,
+    bulk_fetch_geo_ids
+)
+
+
+# Min/max values shared by all requests for the same scheme, per database engine and keyed by
+# (scheme ID, impact category IDs, life cycle stage IDs). The impact categories follow from the scheme's
+# weights and the stages are fixed, so there is one entry per weighting scheme; the entries of an engine
+# go away with the engine itself
+_MinMaxValuesKey = Tuple[int, FrozenSet[int], FrozenSet[int]]
+_min_max_values_cache: "weakref.WeakKeyDictionary[Engine, Dict[_MinMaxValuesKey, schemas.MinMaxValues]]" = (
+    weakref.WeakKeyDictionary()
 )
 
 
@@ -41,7 +56,7 @@ def generate_expected_combinations(
 
     for ic_id in impact_categories:
         if ic_id.ic_id == 17:
-            expected_combinations.add((ic_id, schemas.LCStageID(1)))
+            expected_combinations.add((ic_id, schemas.LCStageID.get(1)))
         else:
             for lc_stage_id in lc_stages:
                 expected_combinations.add((ic_id, lc_stage_id))
@@ -49,11 +64,59 @@ def generate_expected_combinations(
     return expected_combinations
 
 
+def process_input_data_optimized(data: schemas.InputData, session: Session) -> None:
+    """
+    Optimized version of processors.process_input_data that resolves all country acronyms in one query.
+
+    IDENTICAL UniqueID keys, item order and error messages to the original, which looked up the geo_id of
+    every item with its own query.
+
+    Args:
+        data: Input data whose ItemCountryAcronym keys are replaced by UniqueID keys in place
+        session: Database session
+    """
+    parsed_keys = {key: key.get_tuple() for key in data.items if isinstance(key, schemas.ItemCountryAcronym)}
+    # Malformed keys are reported below, in item order
+    try:
+        geo_ids = bulk_fetch_geo_ids(
+            session, {parsed_key[1] for parsed_key in parsed_keys.values() if len(parsed_key) == 2}
+        )
+    except Exception:
+        # Like the original, any lookup failure is reported as an unresolvable acronym, at the first item
+        geo_ids = {}
+
+    updated_items = {}
+    for key, item_amount in data.items.items():
+        if isinstance(key, schemas.ItemCountryAcronym):
+            try:
+                item_id_str, country_acronym = parsed_keys[key]
+            except ValueError:
+                raise ValueError(
+                    f"Invalid format for item_id-country_acronym: {key.item_id_country_acronym}. Expected format: "
+                    f"'item_id-country_acronym'.")
+
+            geo_id = geo_ids.get(country_acronym)
+            if geo_id is None:
+                raise ValueError(f"Invalid country acronym: {country_acronym}. Could not resolve to a geo_id.")
+
+            unique_id = schemas.UniqueID(
+                item_id=schemas.ItemID(item_id_str),
+                item_id_country_acronym=key,
+                geo_id=geo_id
+            )
+            updated_items[unique_id] = item_amount
+
+        elif isinstance(key, schemas.UniqueID):
+            updated_items[key] = item_amount
+
+    data.items = updated_items
+
+
 def process_single_item_results(
     item_id: schemas.ItemID,
     geo_id: schemas.GeoID,
     proxy_flag: bool,
-    weighted_results: Dict[Tuple[int, int], schemas.LCIAValue],
+    weighted_results: Dict[Tuple[int, int], float],
     single_score: schemas.LCIAValue,
     impact_categories: List[schemas.ImpactCategoryID],
     life_cycle_stages: List[schemas.LCStageID]
@@ -77,40 +140,44 @@ def process_single_item_results(
         LCIAResult with identical mathematical processing as original
     """
     try:
-        # Step 3: Initialize dictionaries to store stage and impact category values
-        # IDENTICAL to original processors.get_results() lines 323-324
-        stage_values: Dict[schemas.LCStageID, schemas.LCIAValue] = {}
-        impact_category_values: Dict[schemas.ImpactCategoryID, schemas.LCIAValue] = {}
-
-        # Initialize dictionaries to track normalization counts
-        # IDENTICAL to original processors.get_results() lines 327-328
-        impact_category_normalization: Dict[schemas.LCStageID, int] = {}
-        life_cycle_normalization: Dict[schemas.ImpactCategoryID, int] = {}
-
-        # Step 4: Initialize all LCIA values and normalization counts
-        # IDENTICAL to original processors.get_results() lines 330-337
-        for life_cycle_stage in life_cycle_stages:
-            stage_values[life_cycle_stage] = schemas.LCIAValue(0.0)
-            impact_category_normalization[life_cycle_stage] = 0
-
-        for impact_category_id in impact_categories:
-            impact_category_values[impact_category_id] = schemas.LCIAValue(0.0)
-            life_cycle_normalization[impact_category_id] = 0
+        # Step 3-4: Accumulate the sums and normalization counts in parallel lists indexed by position,
+        # so the per-row loop only touches plain ints and floats; the LCIAValue wrappers are built once
+        # per stage and impact category afterwards
+        # IDENTICAL summation order to original processors.get_results() lines 323-347
+        stage_index = {life_cycle_stage.lc_stage_id: i for i, life_cycle_stage in enumerate(life_cycle_stages)}
+        stage_sums = [0.0] * len(life_cycle_stages)
+        stage_counts = [0] * len(life_cycle_stages)
+
+        impact_category_index = {
+            impact_category_id.ic_id: i for i, impact_category_id in enumerate(impact_categories)
+        }
+        impact_category_sums = [0.0] * len(impact_categories)
+        impact_category_counts = [0] * len(impact_categories)
 
         # Step 5: Sum the weighted values for each stage and impact category, updating normalization counts
-        # IDENTICAL to original processors.get_results() lines 339-347
         for (impact_category_id, life_cycle_stage), lcia_value in weighted_results.items():
-            # Convert raw IDs back to schema objects for mathematical processing
-            ic_schema = schemas.ImpactCategoryID(impact_category_id)
-            lc_schema = schemas.LCStageID(life_cycle_stage)
-            
-            if lc_schema in stage_values:
-                stage_values[lc_schema].lcia_value += lcia_value.lcia_value
-                impact_category_normalization[lc_schema] += 1
+            position = stage_index.get(life_cycle_stage)
+            if position is not None:
+                stage_sums[position] += lcia_value
+                stage_counts[position] += 1
 
-            if ic_schema in impact_category_values:
-                impact_category_values[ic_schema].lcia_value += lcia_value.lcia_value
-                life_cycle_normalization[ic_schema] += 1
+            position = impact_category_index.get(impact_category_id)
+            if position is not None:
+                impact_category_sums[position] += lcia_value
+                impact_category_counts[position] += 1
+
+        stage_values: Dict[schemas.LCStageID, schemas.LCIAValue] = {
+            life_cycle_stage: schemas.LCIAValue(value)
+            for life_cycle_stage, value in zip(life_cycle_stages, stage_sums)
+        }
+        impact_category_normalization: Dict[schemas.LCStageID, int] = dict(zip(life_cycle_stages, stage_counts))
+        impact_category_values: Dict[schemas.ImpactCategoryID, schemas.LCIAValue] = {
+            impact_category_id: schemas.LCIAValue(value)
+            for impact_category_id, value in zip(impact_categories, impact_category_sums)
+        }
+        life_cycle_normalization: Dict[schemas.ImpactCategoryID, int] = dict(
+            zip(impact_categories, impact_category_counts)
+        )
 
         # Step 8: Create the LCIAResult object and handle any validation errors
         # IDENTICAL to original processors.get_results() lines 375-384
@@ -230,7 +297,58 @@ def get_min_max_values_optimized(
     Raises:
         Same exceptions as original crud.get_min_max_values()
     """
-    return bulk_fetch_min_max_values(session, scheme_id, impact_categories, lc_stages)
+    # The database is read-only while the API runs, so min/max values only depend on the database
+    # and the requested IDs; the IN queries do not depend on the ID order
+    engine_cache = _min_max_values_cache.setdefault(session.get_bind(), {})
+    cache_key = (
+        scheme_id.get_value(),
+        frozenset(impact_category.get_value() for impact_category in impact_categories),
+        frozenset(lc_stage.get_value() for lc_stage in lc_stages)
+    )
+    cached = engine_cache.get(cache_key)
+    if cached is None:
+        cached = _freeze_min_max_values(
+            bulk_fetch_min_max_values(session, scheme_id, impact_categories, lc_stages)
+        )
+        engine_cache[cache_key] = cached
+
+    # Every caller gets its own model and dicts; only the read-only values are shared
+    return cached.model_copy(update={
+        'ic_mins': dict(cached.ic_mins),
+        'ic_maxs': dict(cached.ic_maxs),
+        'lc_mins': dict(cached.lc_mins),
+        'lc_maxs': dict(cached.lc_maxs),
+    })
+
+
+def _freeze_min_max_values(min_max_values: schemas.MinMaxValues) -> schemas.MinMaxValues:
+    """
+    Copy min/max values with all LCIA values made read-only, so they can be shared between requests.
+    """
+    def freeze(values):
+        return {key: schemas.FrozenLCIAValue(value.lcia_value) for key, value in values.items()}
+
+    return min_max_values.model_copy(update={
+        'single_score_min': schemas.FrozenLCIAValue(min_max_values.single_score_min.lcia_value),
+        'single_score_max': schemas.FrozenLCIAValue(min_max_values.single_score_max.lcia_value),
+        'ic_mins': freeze(min_max_values.ic_mins),
+        'ic_maxs': freeze(min_max_values.ic_maxs),
+        'lc_mins': freeze(min_max_values.lc_mins),
+        'lc_maxs': freeze(min_max_values.lc_maxs),
+    })
+
+
+def clear_min_max_values_cache(engine: Optional[Engine] = None) -> None:
+    """
+    Forget the cached min/max values of one engine, or of all engines if none is given.
+
+    Must be called when the database behind a running API is replaced in place; restarting the API,
+    as done when deploying a new database, starts with an empty cache anyway.
+    """
+    if engine is None:
+        _min_max_values_cache.clear()
+    else:
+        _min_max_values_cache.pop(engine, None)
 
 
 def get_names_optimized(
@@ -254,4 +372,236 @@ def get_names_optimized(
     Raises:
         Same exceptions as original crud.get_name_by_id()
     """
-    return bulk_fetch_names(session, stage_ids, impact_category_ids)
\ No newline at end of file
+    return bulk_fetch_names(session, stage_ids, impact_category_ids)
+
+
+def scaling_bounds(min_value: float, max_value: float) -> Tuple[float, float, float, float]:
+    """
+    Precompute the parts of processors.log_scale() that only depend on the scaling range.
+
+    Args:
+        min_value: Minimum of the scaling range
+        max_value: Maximum of the scaling range
+
+    Returns:
+        Tuple of (min_value, max_value, log(min_value + 1), log(max_value + 1) - log(min_value + 1))
+    """
+    log_min = math.log(min_value + 1)
+    return min_value, max_value, log_min, math.log(max_value + 1) - log_min
+
+
+def scale_value(
+    lcia_value: float,
+    bounds: Tuple[float, float, float, float],
+    normalization: int,
+    proxy_flag: bool
+) -> float:
+    """
+    Scale a single LCIA value, truncating out-of-range proxy values to 0 or 1.
+
+    IDENTICAL to the truncation and scaling steps repeated in processors.apply_grading_scheme(), with the
+    logarithms of the range taken from scaling_bounds() instead of being recomputed for every value.
+
+    Args:
+        lcia_value: The LCIA value to scale
+        bounds: Scaling range as returned by scaling_bounds()
+        normalization: Normalization count, the scaled value is divided by its square root
+        proxy_flag: Whether the item is a proxy
+
+    Returns:
+        The scaled value
+    """
+    min_value, max_value, log_min, log_range = bounds
+    if proxy_flag:
+        if lcia_value < min_value:
+            return 0
+        elif lcia_value > max_value:
+            return 1
+    return (math.log(lcia_value + 1) - log_min) / log_range / math.sqrt(normalization)
+
+
+def apply_grading_scheme_bulk(
+    lcia_results: List[schemas.LCIAResult],
+    min_max_values: schemas.MinMaxValues
+) -> List[schemas.GradedLCIAResult]:
+    """
+    Optimized version of processors.apply_grading_scheme for many results sharing the same min/max values.
+
+    IDENTICAL mathematical results and validation errors to the original, applied to each result in turn.
+    The min/max bounds are unpacked once into dicts keyed by plain integer IDs, so grading an item no longer
+    hashes and compares Pydantic ID models for every stage and impact category lookup, and the logarithms of
+    every range are taken once via scaling_bounds() instead of once per scaled value.
+
+    Args:
+        lcia_results: LCIA results to grade
+        min_max_values: Min/Max values for scaling each of the graded components
+
+    Returns:
+        List of GradedLCIAResult, in the order of lcia_results
+    """
+    single_score_bounds = scaling_bounds(
+        min_max_values.single_score_min.lcia_value, min_max_values.single_score_max.lcia_value
+    )
+    single_score_min_value, single_score_max_value = single_score_bounds[:2]
+    stage_bounds = {
+        stage_id.lc_stage_id: scaling_bounds(min_value.lcia_value, min_max_values.lc_maxs[stage_id].lcia_value)
+        for stage_id, min_value in min_max_values.lc_mins.items()
+    }
+    impact_category_bounds = {
+        impact_category_id.ic_id: scaling_bounds(
+            min_value.lcia_value, min_max_values.ic_maxs[impact_category_id].lcia_value
+        )
+        for impact_category_id, min_value in min_max_values.ic_mins.items()
+    }
+
+    graded_results = []
+    for lcia_result in lcia_results:
+        proxy_flag = lcia_result.proxy_flag
+
+        # Single score (no normalization for single score)
+        scaled_single_score = scale_value(lcia_result.single_score.lcia_value, single_score_bounds, 1, proxy_flag)
+        try:
+            graded_single_score = schemas.GradedLCIAValue(
+                lcia_value=lcia_result.single_score.lcia_value,
+                scaled_value=scaled_single_score,
+                grade=schemas.GradedLCIAValue.assign_grade(scaled_single_score)
+            )
+        except ValidationError as validation_error:
+            raise ValueError(
+                f"Validation error for single score, item_id={lcia_result.item_id}, geo_id={lcia_result.geo_id}, "
+                f"value={lcia_result.single_score.lcia_value}, scaled_value={scaled_single_score}, "
+                f"min_value={single_score_min_value}, max_value={single_score_max_value}. "
+                f"Original error: {validation_error.errors()}"
+            ) from validation_error
+
+        # Stage values
+        stage_normalization = {
+            stage_id.lc_stage_id: count for stage_id, count in lcia_result.ic_normalization.items()
+        }
+        graded_stages = {}
+        for stage_id, stage_value in lcia_result.stage_values.items():
+            bounds = stage_bounds[stage_id.lc_stage_id]
+            normalization_value = stage_normalization[stage_id.lc_stage_id]
+            scaled_stage_value = scale_value(stage_value.lcia_value, bounds, normalization_value, proxy_flag)
+            try:
+                graded_stages[stage_id] = schemas.GradedLCIAValue(
+                    lcia_value=stage_value.lcia_value,
+                    scaled_value=scaled_stage_value,
+                    grade=schemas.GradedLCIAValue.assign_grade(scaled_stage_value)
+                )
+            except ValidationError as validation_error:
+                raise ValueError(
+                    f"Validation error for stage_id={stage_id}, item_id={lcia_result.item_id}, "
+                    f"geo_id={lcia_result.geo_id}, value={stage_value.lcia_value}, "
+                    f"scaled_value={scaled_stage_value}, min_value={bounds[0]}, max_value={bounds[1]}, "
+                    f"normalization_value={normalization_value}. Original error: {validation_error.errors()}"
+                ) from validation_error
+
+        # Impact category values
+        impact_category_normalization = {
+            impact_category_id.ic_id: count for impact_category_id, count in lcia_result.lc_normalization.items()
+        }
+        graded_impact_categories = {}
+        for impact_category_id, impact_category_value in lcia_result.impact_category_values.items():
+            bounds = impact_category_bounds[impact_category_id.ic_id]
+            normalization_value = impact_category_normalization[impact_category_id.ic_id]
+            scaled_impact_category_value = scale_value(
+                impact_category_value.lcia_value, bounds, normalization_value, proxy_flag
+            )
+            try:
+                graded_impact_categories[impact_category_id] = schemas.GradedLCIAValue(
+                    lcia_value=impact_category_value.lcia_value,
+                    scaled_value=scaled_impact_category_value,
+                    grade=schemas.GradedLCIAValue.assign_grade(scaled_impact_category_value)
+                )
+            except ValidationError as validation_error:
+                raise ValueError(
+                    f"Validation error for impact_category_id={impact_category_id}, item_id={lcia_result.item_id}, "
+                    f"geo_id={lcia_result.geo_id}, value={impact_category_value.lcia_value}, "
+                    f"scaled_value={scaled_impact_category_value}, min_value={bounds[0]}, "
+                    f"max_value={bounds[1]}, normalization_value={normalization_value}. "
+                    f"Original error: {validation_error.errors()}"
+                ) from validation_error
+
+        graded_results.append(schemas.GradedLCIAResult(
+            item_id=lcia_result.item_id,
+            geo_id=lcia_result.geo_id,
+            proxy_flag=lcia_result.proxy_flag,
+            single_score=graded_single_score,
+            stage_values=graded_stages,
+            impact_category_values=graded_impact_categories
+        ))
+
+    return graded_results
+
+
+def calculate_recipe_bulk(graded_lcia_results: List[schemas.GradedLCIAResult]) -> schemas.GradedLCIAResult:
+    """
+    Optimized version of processors.calculate_recipe.
+
+    IDENTICAL summation order, combined grades and key order to the original. The per-stage and per-impact-category
+    columns are collected in dicts keyed by plain integer IDs, so aggregating an item no longer hashes and compares
+    Pydantic ID models for every value; each output key is the first ID model seen for that ID.
+
+    Args:
+        graded_lcia_results: Graded LCIA results of all items in the recipe
+
+    Returns:
+        The aggregated GradedLCIAResult of the recipe
+    """
+    single_scaled_values = []
+    single_raw_value = 0
+    impact_category_ids: Dict[int, schemas.ImpactCategoryID] = {}
+    impact_category_scaled_values: Dict[int, List[float]] = {}
+    impact_category_raw_values: Dict[int, float] = {}
+    stage_ids: Dict[int, schemas.LCStageID] = {}
+    stage_scaled_values: Dict[int, List[float]] = {}
+    stage_raw_values: Dict[int, float] = {}
+
+    for result in graded_lcia_results:
+        single_scaled_values.append(result.single_score.scaled_value)
+        single_raw_value += result.single_score.lcia_value
+
+        for impact_category_id, graded_value in result.impact_category_values.items():
+            key = impact_category_id.ic_id
+            scaled_values = impact_category_scaled_values.get(key)
+            if scaled_values is None:
+                impact_category_ids[key] = impact_category_id
+                scaled_values = impact_category_scaled_values[key] = []
+                impact_category_raw_values[key] = 0
+            scaled_values.append(graded_value.scaled_value)
+            impact_category_raw_values[key] += graded_value.lcia_value
+
+        for stage_id, graded_value in result.stage_values.items():
+            key = stage_id.lc_stage_id
+            scaled_values = stage_scaled_values.get(key)
+            if scaled_values is None:
+                stage_ids[key] = stage_id
+                scaled_values = stage_scaled_values[key] = []
+                stage_raw_values[key] = 0
+            scaled_values.append(graded_value.scaled_value)
+            stage_raw_values[key] += graded_value.lcia_value
+
+    def combine(raw_value: float, scaled_values: List[float]) -> schemas.GradedLCIAValue:
+        combined_scaled_value = processors.get_combined_grade(*scaled_values)
+        return schemas.GradedLCIAValue(
+            lcia_value=raw_value,
+            scaled_value=combined_scaled_value,
+            grade=schemas.GradedLCIAValue.assign_grade(combined_scaled_value)
+        )
+
+    graded_single_score = combine(single_raw_value, single_scaled_values)
+    graded_impact_categories = {
+        impact_category_ids[key]: combine(impact_category_raw_values[key], scaled_values)
+        for key, scaled_values in impact_category_scaled_values.items()
+    }
+    graded_stages = {
+        stage_ids[key]: combine(stage_raw_values[key], scaled_values)
+        for key, scaled_values in stage_scaled_values.items()
+    }
+
+    return schemas.GradedLCIAResult(
+        single_score=graded_single_score,
+        stage_values=graded_stages,
+        impact_category_values=graded_impact_categories
+    )
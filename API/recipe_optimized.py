@@ -11,11 +11,14 @@ from fastapi import Depends
 from sqlmodel import Session
 from typing import Dict
 
-from API import schemas, processors, crud, exceptions, dependencies
+from API import schemas, crud, exceptions, dependencies
 from API.processors_optimized import (
+    apply_grading_scheme_bulk,
+    calculate_recipe_bulk,
     get_results_bulk,
     get_min_max_values_optimized,
-    get_names_optimized
+    get_names_optimized,
+    process_input_data_optimized
 )
 
 
@@ -47,8 +50,8 @@ async def calculate_recipe_optimized(
         Same exceptions as original calculate_recipe endpoint
     """
     try:
-        # IDENTICAL input processing to original (main.py lines 442-450)
-        processors.process_input_data(data, session)
+        # OPTIMIZATION: Resolve all country acronyms in one query instead of one query per item
+        process_input_data_optimized(data, session)
 
         # Fetch the corresponding weighting scheme name or ID if necessary
         if not data.weighting_scheme_name and data.weighting_scheme_id:
@@ -61,10 +64,10 @@ async def calculate_recipe_optimized(
         impact_category_weights = crud.get_ic_weights_by_scheme_id(session, data.weighting_scheme_id)
         impact_categories = list(impact_category_weights.weights.keys())
         lc_stages = [
-            schemas.LCStageID(1),
-            schemas.LCStageID(2),
-            schemas.LCStageID(4),
-            schemas.LCStageID(5)
+            schemas.LCStageID.get(1),
+            schemas.LCStageID.get(2),
+            schemas.LCStageID.get(4),
+            schemas.LCStageID.get(5)
         ]
 
         # OPTIMIZATION: Bulk fetch all item data instead of N+1 queries
@@ -85,8 +88,10 @@ async def calculate_recipe_optimized(
         min_max_values = get_min_max_values_optimized(session, data.weighting_scheme_id, impact_categories, lc_stages)
 
         # IDENTICAL mathematical processing to original (main.py lines 484-489)
-        graded_item_results = [processors.apply_grading_scheme(item_result, min_max_values) for item_result in item_results]
-        recipe_scores = processors.calculate_recipe(graded_item_results)
+        # OPTIMIZATION: Min/max bounds are unpacked once for all items instead of per item, and the recipe
+        # aggregation collects values by integer stage / impact category IDs
+        graded_item_results = apply_grading_scheme_bulk(item_results, min_max_values)
+        recipe_scores = calculate_recipe_bulk(graded_item_results)
 
         # IDENTICAL collection logic to original (main.py lines 491-502)
         stage_ids = set()
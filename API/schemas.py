@@ -18,6 +18,13 @@ from pydantic_core.core_schema import ValidationInfo
 
 from API import exceptions
 
+# Validation patterns, compiled once at import instead of being looked up in the `re` cache on every validation
+ITEM_ID_PATTERN = re.compile(r"^\d{4,5}(?:_\d+)?$")
+COUNTRY_ACRONYM_PATTERN = re.compile(r"^[A-Z]{3}$")
+
+# Instances shared through BaseConfigModel.get, keyed by (model class, value)
+_interned_instances: Dict[tuple, "BaseConfigModel"] = {}
+
 
 # Basic configuration models
 class BaseConfigModel(BaseModel):
@@ -35,6 +42,20 @@ class BaseConfigModel(BaseModel):
         field_name = next(iter(self.model_fields))
         return getattr(self, field_name)
 
+    @classmethod
+    def get(cls, value):
+        """
+        Return a shared, validated instance for the value, creating it on first use.
+
+        The models are frozen, so repeated lookups can skip Pydantic validation by reusing the instance. Interned
+        instances are never released, so only use this for small value domains such as stage or impact category IDs.
+        """
+        key = (cls, value)
+        instance = _interned_instances.get(key)
+        if instance is None:
+            instance = _interned_instances[key] = cls(value)
+        return instance
+
 
 class ExcludingBaseConfigModel(BaseConfigModel):
     """
@@ -250,8 +271,7 @@ class ItemID(BaseConfigModel):
         Validates that the `item_id` is in the correct format, which must be a 4 or 5 digit integer optionally followed
         by an underscore and more digits.
         """
-        regex = r"^\d{4,5}(?:_\d+)?$"
-        if not isinstance(value, str) or not re.match(regex, value):
+        if not isinstance(value, str) or not ITEM_ID_PATTERN.match(value):
             raise ValueError(
                 "ItemID must be a 4 or 5 digit integer, optionally followed by an"
                 " underscore and more digits"
@@ -394,7 +414,7 @@ class ItemCountryAcronym(BaseConfigModel):
             raise ValueError("Invalid format for 'item_id-country_acronym', expected format 'item_id-alpha3_country'")
 
         # Validate that country_acronym is in ISO 3166-1 alpha-3 format (three uppercase letters)
-        if not re.match(r"^[A-Z]{3}$", country_acronym):
+        if not COUNTRY_ACRONYM_PATTERN.match(country_acronym):
             raise ValueError(f"Invalid country acronym: {country_acronym}. Must be a valid ISO 3166-1 alpha-3 code.")
 
         return value
@@ -590,6 +610,13 @@ class LCIAValue(BaseModel):
         return v
 
 
+class FrozenLCIAValue(LCIAValue):
+    """
+    Read-only LCIAValue, for values that are shared between requests.
+    """
+    model_config = ConfigDict(frozen=True)
+
+
 class LCIAResult(BaseModel):
     """
     A model representing the Life Cycle Impact Assessment (LCIA) result for a specific item, geographical location,
@@ -911,9 +938,7 @@ class OutputData(BaseModel):
         """
         # Simplify custom serialization to avoid complex logic in this function
         contains_proxy = any(self.proxy_flags.values())
-        overall_mass = sum(
-            self.input_data.items[item_id].amount for item_id in self.input_data.items
-        )
+        overall_mass = sum(amount.amount for amount in self.input_data.items.values())
 
         # Build recipe info
         recipe_info = {
@@ -928,54 +953,59 @@ class OutputData(BaseModel):
                 "Scaled Value": self.recipe_scores.single_score.scaled_value
             },
             "Items": {
-                unique_id.item_id_country_acronym.item_id_country_acronym: f"{amount.amount} kg"
-                for unique_id, amount in self.input_data.items.items()
+                self._serialize_item_key(item_key): f"{amount.amount} kg"
+                for item_key, amount in self.input_data.items.items()
             },
-            "Stages": {
-                self.stage_names[stage_id]: {
-                    "lcia_value": stage_value.lcia_value,
-                    "Grade": stage_value.grade,
-                    "Scaled Value": stage_value.scaled_value
-                } for stage_id, stage_value in self.recipe_scores.stage_values.items()
-            },
-            "Impact Categories": {
-                self.impact_category_names[ic_id]: {
-                    "lcia_value": ic_value.lcia_value,
-                    "Grade": ic_value.grade,
-                    "Scaled Value": ic_value.scaled_value
-                } for ic_id, ic_value in self.recipe_scores.impact_category_values.items()
-            }
+            "Stages": self._serialize_stage_values(self.recipe_scores),
+            "Impact Categories": self._serialize_impact_category_values(self.recipe_scores)
         }
 
         # Return serialized output
         return {
             "Recipe Info": recipe_info,
             "Item Results": {
-                unique_id.item_id_country_acronym.item_id_country_acronym: {
+                self._serialize_item_key(unique_id): {
                     "Single Score": {
                         "Single Score": item_result.single_score.lcia_value,
                         "Grade": item_result.single_score.grade,
                         "Scaled Value": item_result.single_score.scaled_value,
-                        "contains_proxy": self.proxy_flags[unique_id]
+                        "contains_proxy": proxy_flag
                     },
-                    "Stages": {
-                        self.stage_names[stage_id]: {
-                            "lcia_value": stage_value.lcia_value,
-                            "Grade": stage_value.grade,
-                            "Scaled Value": stage_value.scaled_value
-                        } for stage_id, stage_value in item_result.stage_values.items()
-                    },
-                    "Impact Categories": {
-                        self.impact_category_names[ic_id]: {
-                            "lcia_value": ic_value.lcia_value,
-                            "Grade": ic_value.grade,
-                            "Scaled Value": ic_value.scaled_value
-                        } for ic_id, ic_value in item_result.impact_category_values.items()
-                    }
-                } for unique_id, item_result in zip(self.proxy_flags.keys(), self.graded_lcia_results)
+                    "Stages": self._serialize_stage_values(item_result),
+                    "Impact Categories": self._serialize_impact_category_values(item_result)
+                } for (unique_id, proxy_flag), item_result in zip(self.proxy_flags.items(), self.graded_lcia_results)
             }
         }
 
+    @staticmethod
+    def _serialize_item_key(item_key: Union[ItemCountryAcronym, UniqueID]) -> str:
+        # Input items are keyed by ItemCountryAcronym until processors.process_input_data resolves them to UniqueID
+        if isinstance(item_key, UniqueID):
+            item_key = item_key.item_id_country_acronym
+        return item_key.item_id_country_acronym
+
+    @staticmethod
+    def _serialize_graded_value(graded_value: GradedLCIAValue) -> dict:
+        return {
+            "lcia_value": graded_value.lcia_value,
+            "Grade": graded_value.grade,
+            "Scaled Value": graded_value.scaled_value
+        }
+
+    def _serialize_stage_values(self, graded_result: GradedLCIAResult) -> dict:
+        stage_names = self.stage_names
+        return {
+            stage_names[stage_id]: self._serialize_graded_value(stage_value)
+            for stage_id, stage_value in graded_result.stage_values.items()
+        }
+
+    def _serialize_impact_category_values(self, graded_result: GradedLCIAResult) -> dict:
+        impact_category_names = self.impact_category_names
+        return {
+            impact_category_names[ic_id]: self._serialize_graded_value(ic_value)
+            for ic_id, ic_value in graded_result.impact_category_values.items()
+        }
+
     # Retain the schema definition for OpenAPI docs
     model_config = ConfigDict(
         json_schema_extra={
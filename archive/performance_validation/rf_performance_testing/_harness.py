@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Shared benchmark harness for the original-vs-optimized comparison scripts.
+
+Bundles the pieces that rf_final_validation_test.py, rf_quick_new_db_comparison.py
+and rf_test_calculate_endpoint.py used to re-implement individually:
+- a single pooled HTTP session reused for every request
+- timed GET/POST calls against a URL with a pre-encoded body
+- byte-level consistency checks between two response bodies
+- a bench() driver running every payload against every endpoint
+- a pooled SESSION/POOL with timed_post() and extract_score() for the one-shot
+  rf_test_optimized_*.py checks
+"""
+
+import asyncio
+import atexit
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# Pooled keep-alive session shared by every request of the run
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=0))
+SESSION.headers.update({"Connection": "keep-alive", "Content-Type": "application/json"})
+
+# Every call of every test case is independent, so all of them are in flight at once
+# (bounded by the worker count); one pool for the whole run so threads start only once
+POOL = ThreadPoolExecutor(max_workers=4)
+atexit.register(POOL.shutdown)
+
+
+def timed_post(url: str, body: bytes) -> Tuple[requests.Response, float]:
+    """POST a pre-encoded JSON body to url and return the response with its round-trip time."""
+    start_ns = time.perf_counter_ns()
+    response = SESSION.post(url, data=body, timeout=30)
+    return response, (time.perf_counter_ns() - start_ns) / 1e9
+
+
+# The recipe score sits right after the scalar fields of recipe_scores, so it can be
+# pulled from the raw body; every graded result (plus recipe_scores) has one single_score
+SCORE_RE = re.compile(rb'"recipe_scores"\s*:\s*\{[^{}]*?"single_score"\s*:\s*(-?[\d.]+(?:[eE][-+]?\d+)?)')
+
+
+def extract_score(body: bytes, expected_items: int, full: bool = False) -> Tuple[float, int]:
+    """
+    Recipe single score and number of graded items, parsing the whole body only if needed.
+
+    The item count from scanning the body is only trusted if it matches expected_items;
+    otherwise (e.g. a "single_score" key elsewhere in the body) the body is parsed in full.
+    """
+    match = None if full else SCORE_RE.search(body)
+    if match is not None:
+        item_count = body.count(b'"single_score"') - 1
+        if item_count == expected_items:
+            return float(match.group(1)), item_count
+    data = orjson.loads(body)
+    return data["recipe_scores"]["single_score"], len(data["graded_lcia_results"])
+
+
+@dataclass
+class CallResult:
+    """Outcome of a single timed HTTP call."""
+    success: bool
+    duration: float  # seconds, measured with perf_counter_ns
+    status_code: int = 0
+    body: bytes = b""
+    error: str = ""
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+@dataclass
+class PayloadReport:
+    """All timed calls of one payload across every benchmarked endpoint."""
+    payload: Optional[Dict[str, Any]]
+    calls: Dict[str, List[CallResult]] = field(default_factory=dict)
+
+    def times(self, endpoint: str) -> List[float]:
+        """Durations of the successful calls against an endpoint."""
+        return [call.duration for call in self.calls.get(endpoint, []) if call.success]
+
+    def mean(self, endpoint: str) -> Optional[float]:
+        times = self.times(endpoint)
+        return sum(times) / len(times) if times else None
+
+    def speedup(self, baseline: str, candidate: str) -> Optional[float]:
+        baseline_mean = self.mean(baseline)
+        candidate_mean = self.mean(candidate)
+        if baseline_mean is None or not candidate_mean:
+            return None
+        return baseline_mean / candidate_mean
+
+    def consistent(self, baseline: str, candidate: str) -> Optional[bool]:
+        """Whether every iteration returned byte-identical bodies, None if a call failed."""
+        pairs = list(zip(self.calls.get(baseline, []), self.calls.get(candidate, [])))
+        if not pairs or not all(a.success and b.success for a, b in pairs):
+            return None
+        return all(BenchHarness.consistency_check(a.body, b.body) for a, b in pairs)
+
+
+@dataclass
+class Report:
+    """Result of a bench() run, one PayloadReport per payload."""
+    endpoints: List[str]
+    entries: List[PayloadReport]
+
+    def to_dict(self) -> Dict[str, Any]:
+        baseline, candidates = self.endpoints[0], self.endpoints[1:]
+        return {
+            "endpoints": self.endpoints,
+            "entries": [
+                {
+                    "payload": entry.payload,
+                    "times": {endpoint: entry.times(endpoint) for endpoint in self.endpoints},
+                    "errors": {
+                        endpoint: [call.error for call in entry.calls.get(endpoint, []) if not call.success]
+                        for endpoint in self.endpoints
+                    },
+                    "speedup": {
+                        candidate: entry.speedup(baseline, candidate) for candidate in candidates
+                    },
+                    "consistent": {
+                        candidate: entry.consistent(baseline, candidate) for candidate in candidates
+                    },
+                }
+                for entry in self.entries
+            ],
+        }
+
+
+class BenchHarness:
+    """Pooled session plus executor shared by all benchmark scripts."""
+
+    def __init__(self, timeout: float = 30, max_workers: int = 2, warmup: int = 1):
+        self.timeout = timeout
+        self.warmup = warmup
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def __enter__(self) -> "BenchHarness":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+    @staticmethod
+    def encode(payload: Optional[Dict[str, Any]]) -> Optional[bytes]:
+        """Encode a JSON payload once so it can be reused across timed calls."""
+        return None if payload is None else json.dumps(payload).encode("utf-8")
+
+    def timed_call(self, url: str, body_bytes: Optional[bytes] = None) -> CallResult:
+        """POST body_bytes to url (GET if no body) and time the full round trip."""
+        start_ns = time.perf_counter_ns()
+        try:
+            if body_bytes is None:
+                response = self.session.get(url, timeout=self.timeout)
+            else:
+                response = self.session.post(url, data=body_bytes, timeout=self.timeout)
+            body = response.content
+            duration = (time.perf_counter_ns() - start_ns) / 1e9
+        except Exception as e:
+            return CallResult(False, (time.perf_counter_ns() - start_ns) / 1e9, error=str(e))
+        return self._call_result(response, body, duration)
+
+    @staticmethod
+    def _call_result(response, body: bytes, duration: float) -> CallResult:
+        """Build a CallResult from a requests or httpx response."""
+        if response.status_code != 200:
+            error = f"HTTP {response.status_code}: {response.text[:200]}..."
+            return CallResult(False, duration, response.status_code, body, error)
+        return CallResult(True, duration, response.status_code, body)
+
+    @staticmethod
+    def consistency_check(bytes_a: bytes, bytes_b: bytes) -> bool:
+        """Compare two in-memory response bodies byte for byte; cheaper than hashing both, and exact."""
+        return bytes_a == bytes_b
+
+    def warm_up(self, endpoints: List[str], body_bytes: Optional[bytes]) -> None:
+        """Send untimed requests so cold caches and connection setup stay out of the measurements."""
+        for _ in range(self.warmup):
+            for endpoint in endpoints:
+                call = self.timed_call(endpoint, body_bytes)
+                status = f"{call.duration:.3f}s" if call.success else f"ERROR {call.error}"
+                print(f"  (warmup) {endpoint}: {status}")
+
+    def bench(self, endpoints: List[str], payloads: List[Optional[Dict[str, Any]]], iterations: int) -> Report:
+        """
+        Time every payload against every endpoint.
+
+        Each payload is first sent self.warmup times untimed, then each iteration hits
+        all endpoints concurrently; a payload of None issues a GET.
+        """
+        entries = []
+        for payload in payloads:
+            body_bytes = self.encode(payload)
+            self.warm_up(endpoints, body_bytes)
+            entry = PayloadReport(payload, {endpoint: [] for endpoint in endpoints})
+            for _ in range(iterations):
+                futures = {
+                    endpoint: self.executor.submit(self.timed_call, endpoint, body_bytes)
+                    for endpoint in endpoints
+                }
+                for endpoint, future in futures.items():
+                    entry.calls[endpoint].append(future.result())
+            entries.append(entry)
+        return Report(list(endpoints), entries)
+
+    def bench_concurrent(
+        self,
+        endpoints: List[str],
+        payloads: List[Optional[Dict[str, Any]]],
+        iterations: int,
+        concurrency: int = 10,
+        on_entry: Optional[Callable[[int, PayloadReport], None]] = None,
+    ) -> Report:
+        """
+        Like bench(), but submits every payload, endpoint and iteration at once.
+
+        At most `concurrency` requests are in flight at any time so neither container
+        is overloaded; warmup requests are sent before any timed request. If given,
+        on_entry(index, entry) is called for each payload as soon as all of its calls
+        have finished, while the other payloads are still running.
+        """
+        return asyncio.run(self._bench_concurrent(endpoints, payloads, iterations, concurrency, on_entry))
+
+    async def _bench_concurrent(
+        self,
+        endpoints: List[str],
+        payloads: List[Optional[Dict[str, Any]]],
+        iterations: int,
+        concurrency: int,
+        on_entry: Optional[Callable[[int, PayloadReport], None]],
+    ) -> Report:
+        semaphore = asyncio.Semaphore(concurrency)
+        bodies = [self.encode(payload) for payload in payloads]
+
+        async with httpx.AsyncClient(timeout=self.timeout, headers={"Content-Type": "application/json"}) as client:
+
+            async def timed_call(url: str, body_bytes: Optional[bytes]) -> CallResult:
+                async with semaphore:
+                    start_ns = time.perf_counter_ns()
+                    try:
+                        if body_bytes is None:
+                            response = await client.get(url)
+                        else:
+                            response = await client.post(url, content=body_bytes)
+                        duration = (time.perf_counter_ns() - start_ns) / 1e9
+                    except Exception as e:
+                        return CallResult(False, (time.perf_counter_ns() - start_ns) / 1e9, error=str(e))
+                    return self._call_result(response, response.content, duration)
+
+            async def bench_payload(index: int) -> Tuple[int, PayloadReport]:
+                calls = iter(await asyncio.gather(*(
+                    timed_call(endpoint, bodies[index]) for endpoint in endpoints for _ in range(iterations)
+                )))
+                entry = PayloadReport(payloads[index], {})
+                for endpoint in endpoints:
+                    entry.calls[endpoint] = [next(calls) for _ in range(iterations)]
+                return index, entry
+
+            await asyncio.gather(*(
+                timed_call(endpoint, body_bytes)
+                for body_bytes in bodies for endpoint in endpoints for _ in range(self.warmup)
+            ))
+            # Every payload's calls are scheduled at once; each payload is reported as soon as its own group is done
+            entries: List[Optional[PayloadReport]] = [None] * len(payloads)
+            for completed in asyncio.as_completed([bench_payload(index) for index in range(len(payloads))]):
+                index, entry = await completed
+                entries[index] = entry
+                if on_entry is not None:
+                    on_entry(index, entry)
+
+        return Report(list(endpoints), entries)
+
+
+def bench(endpoints: List[str], payloads: List[Optional[Dict[str, Any]]], iterations: int, warmup: int = 1) -> Report:
+    """Run a one-off benchmark with a throwaway harness."""
+    with BenchHarness(warmup=warmup) as harness:
+        return harness.bench(endpoints, payloads, iterations)
@@ -9,16 +9,18 @@ Comprehensive performance and mathematical consistency testing between:
 This is the final validation before confirming the optimization is production-ready.
 """
 
-import json
-import time
-import statistics
-from typing import List, Dict, Tuple, Any
-import requests
+from typing import BinaryIO, List, Dict, Any, Optional
+
+import numpy as np
+import orjson
+
+from _harness import BenchHarness, CallResult, PayloadReport
 
 class FinalValidationSuite:
-    def __init__(self):
-        self.original_url = "http://localhost:8080"
-        self.optimized_url = "http://localhost:8081"
+    def __init__(self, harness: BenchHarness):
+        self.harness = harness
+        self.original_url = "http://localhost:8080/calculate-recipe/"
+        self.optimized_url = "http://localhost:8081/calculate-recipe/"
         
         # Test items from the validated 20-item dataset
         self.test_items = [
@@ -49,28 +51,6 @@ class FinalValidationSuite:
             recipe[item] = amount
         return recipe
     
-    def test_single_endpoint(self, url: str, recipe_data: Dict[str, Any], container_name: str) -> Tuple[bool, float, Dict[str, Any], str]:
-        """Test a single endpoint and return success, time, data, and any error."""
-        start_time = time.time()
-        try:
-            response = requests.post(
-                f"{url}/calculate-recipe/",
-                json=recipe_data,
-                timeout=30
-            )
-            response_time = time.time() - start_time
-            
-            if response.status_code == 200:
-                data = response.json()
-                return True, response_time, data, ""
-            else:
-                error_msg = f"HTTP {response.status_code}: {response.text[:200]}..."
-                return False, response_time, {}, error_msg
-                
-        except Exception as e:
-            response_time = time.time() - start_time
-            return False, response_time, {}, str(e)
-    
     def extract_key_metrics(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Extract key metrics from response for comparison."""
         try:
@@ -86,14 +66,24 @@ class FinalValidationSuite:
         except Exception as e:
             return {"error": f"Failed to extract metrics: {e}"}
     
-    def compare_results(self, orig_metrics: Dict, opt_metrics: Dict) -> Dict[str, Any]:
-        """Compare metrics between original and optimized results."""
+    def compare_results(self, orig_call: CallResult, opt_call: CallResult) -> Dict[str, Any]:
+        """Compare original and optimized results.
+
+        Byte-identical responses are accepted via a direct byte comparison; key metrics are
+        only extracted and compared field by field when the raw bodies differ.
+        """
         comparison = {
             "identical": True,
             "differences": [],
             "single_score_diff": 0.0
         }
         
+        if self.harness.consistency_check(orig_call.body, opt_call.body):
+            return comparison
+        
+        orig_metrics = self.extract_key_metrics(orig_call.json())
+        opt_metrics = self.extract_key_metrics(opt_call.json())
+        
         # Check if both have errors
         if "error" in orig_metrics or "error" in opt_metrics:
             comparison["identical"] = False
@@ -118,53 +108,53 @@ class FinalValidationSuite:
         
         return comparison
     
-    def run_recipe_test(self, recipe_size: int, iterations: int = 3) -> Dict[str, Any]:
-        """Run comprehensive test for a specific recipe size."""
+    def build_recipe_data(self, recipe_size: int) -> Dict[str, Any]:
+        """Build the request body for a recipe of the given size."""
+        return {
+            "items": self.generate_test_recipe(recipe_size),
+            "weighting_scheme_name": "delphi_r0110"
+        }
+    
+    def run_recipe_test(self, recipe_size: int, iterations: int = 3, entry: Optional[PayloadReport] = None) -> Dict[str, Any]:
+        """Run comprehensive test for a specific recipe size.
+
+        If `entry` holds calls that were already made for this recipe size, they are
+        evaluated instead of benchmarking the endpoints again.
+        """
         print(f"\n{'='*80}")
         print(f"FINAL VALIDATION: {recipe_size} ITEM RECIPE ({iterations} iterations)")
         print(f"{'='*80}")
         
-        recipe_items = self.generate_test_recipe(recipe_size)
-        recipe_data = {
-            "items": recipe_items,
-            "weighting_scheme_name": "delphi_r0110"
-        }
+        recipe_data = self.build_recipe_data(recipe_size) if entry is None else entry.payload
+        recipe_items = recipe_data["items"]
         
         print(f"Recipe: {len(recipe_items)} items, Total mass: {sum(recipe_items.values()):.3f} kg")
         
+        if entry is None:
+            entry = self.harness.bench([self.original_url, self.optimized_url], [recipe_data], iterations).entries[0]
+        
         orig_times = []
         opt_times = []
         consistency_results = []
         
-        for iteration in range(iterations):
+        for iteration, (orig_call, opt_call) in enumerate(zip(entry.calls[self.original_url], entry.calls[self.optimized_url])):
             print(f"\n--- Iteration {iteration + 1}/{iterations} ---")
             
-            # Test original container
-            orig_success, orig_time, orig_data, orig_error = self.test_single_endpoint(
-                self.original_url, recipe_data, "Original"
-            )
+            if not orig_call.success:
+                print(f"❌ Original container failed: {orig_call.error}")
+                return {"status": "failed", "reason": f"Original failed: {orig_call.error}"}
             
-            if not orig_success:
-                print(f"❌ Original container failed: {orig_error}")
-                return {"status": "failed", "reason": f"Original failed: {orig_error}"}
+            if not opt_call.success:
+                print(f"❌ Optimized container failed: {opt_call.error}")
+                return {"status": "failed", "reason": f"Optimized failed: {opt_call.error}"}
             
+            orig_time = orig_call.duration
+            opt_time = opt_call.duration
             orig_times.append(orig_time)
-            orig_metrics = self.extract_key_metrics(orig_data)
-            
-            # Test optimized container
-            opt_success, opt_time, opt_data, opt_error = self.test_single_endpoint(
-                self.optimized_url, recipe_data, "Optimized"
-            )
-            
-            if not opt_success:
-                print(f"❌ Optimized container failed: {opt_error}")
-                return {"status": "failed", "reason": f"Optimized failed: {opt_error}"}
-            
             opt_times.append(opt_time)
-            opt_metrics = self.extract_key_metrics(opt_data)
             
             # Compare results
-            comparison = self.compare_results(orig_metrics, opt_metrics)
+            comparison = self.compare_results(orig_call, opt_call)
             consistency_results.append(comparison)
             
             # Print iteration results
@@ -178,9 +168,13 @@ class FinalValidationSuite:
                 print(f"   Differences: {', '.join(comparison['differences'])}")
         
         # Calculate statistics
-        orig_avg = statistics.mean(orig_times)
-        opt_avg = statistics.mean(opt_times)
+        orig = np.asarray(orig_times)
+        opt = np.asarray(opt_times)
+        orig_avg = float(orig.mean())
+        opt_avg = float(opt.mean())
         avg_speedup = orig_avg / opt_avg if opt_avg > 0 else 0
+        orig_p50, orig_p95 = np.percentile(orig, [50, 95]).tolist()
+        opt_p50, opt_p95 = np.percentile(opt, [50, 95]).tolist()
         
         all_identical = all(result["identical"] for result in consistency_results)
         max_score_diff = max(result["single_score_diff"] for result in consistency_results)
@@ -193,6 +187,12 @@ class FinalValidationSuite:
                 "original_avg": orig_avg,
                 "optimized_avg": opt_avg,
                 "avg_speedup": avg_speedup,
+                "original_p50": orig_p50,
+                "original_p95": orig_p95,
+                "original_std": float(orig.std()),
+                "optimized_p50": opt_p50,
+                "optimized_p95": opt_p95,
+                "optimized_std": float(opt.std()),
                 "original_times": orig_times,
                 "optimized_times": opt_times
             },
@@ -204,16 +204,21 @@ class FinalValidationSuite:
         }
         
         print(f"\n📊 SUMMARY FOR {recipe_size} ITEMS:")
-        print(f"   Original avg:    {orig_avg:.3f}s")
-        print(f"   Optimized avg:   {opt_avg:.3f}s")
+        print(f"   Original avg:    {orig_avg:.3f}s (p50 {orig_p50:.3f}s, p95 {orig_p95:.3f}s)")
+        print(f"   Optimized avg:   {opt_avg:.3f}s (p50 {opt_p50:.3f}s, p95 {opt_p95:.3f}s)")
         print(f"   Average speedup: {avg_speedup:.1f}x")
         print(f"   Consistency:     {result['consistency']['consistent_iterations']}/{iterations} ✅")
         print(f"   Max score diff:  {max_score_diff:.2e}")
         
         return result
     
-    def run_comprehensive_validation(self):
-        """Run the complete final validation suite."""
+    def run_comprehensive_validation(self, output: Optional[BinaryIO] = None):
+        """Run the complete final validation suite.
+
+        If `output` is given, each successful result is appended to it as an element of a
+        JSON array as soon as its recipe size completes (so in completion order, not size
+        order), and its per-iteration timings are dropped from memory afterwards.
+        """
         print("FIT API FINAL VALIDATION TEST SUITE")
         print("=" * 80)
         print("Testing Original (port 8080) vs Optimized (port 8081) containers")
@@ -222,23 +227,59 @@ class FinalValidationSuite:
         # Test various recipe sizes
         test_sizes = [1, 3, 5, 8, 12, 15]
         iterations = 3
+        # Requests in flight across both containers; latencies include any queueing this causes
+        concurrency = 10
         
         print(f"Test plan: {len(test_sizes)} recipe sizes, {iterations} iterations each")
         print(f"Recipe sizes: {test_sizes}")
+        print(f"Latencies are measured with up to {concurrency} concurrent requests, not one request at a time")
         
         all_results = []
         
         for size in test_sizes:
             if size > len(self.test_items):
                 print(f"\n⚠️  Skipping size {size} - insufficient test items")
-                continue
-                
-            result = self.run_recipe_test(size, iterations)
+        
+        test_sizes = [size for size in test_sizes if size <= len(self.test_items)]
+        
+        if output is not None:
+            output.write(b"[")
+        
+        failed = []
+        
+        def record_size(index: int, entry: PayloadReport) -> None:
+            # Called as soon as all calls of one size are done, in completion order, while the other
+            # sizes are still running; after a failure the remaining sizes are no longer evaluated
+            if failed:
+                return
+            size = test_sizes[index]
+            result = self.run_recipe_test(size, iterations, entry)
             if result["status"] == "success":
+                result["concurrency"] = concurrency
+                if output is not None:
+                    if all_results:
+                        output.write(b",")
+                    output.write(orjson.dumps(result))
+                    output.flush()
+                    del result["performance"]["original_times"], result["performance"]["optimized_times"]
                 all_results.append(result)
             else:
                 print(f"❌ Test failed for recipe size {size}: {result['reason']}")
-                break
+                failed.append(size)
+        
+        # Sweep all sizes against both containers at once, bounded to `concurrency` requests in flight;
+        # each size's record is written as soon as that size's calls are done
+        self.harness.bench_concurrent(
+            [self.original_url, self.optimized_url],
+            [self.build_recipe_data(size) for size in test_sizes],
+            iterations,
+            concurrency=concurrency,
+            on_entry=record_size,
+        )
+        all_results.sort(key=lambda result: result["recipe_size"])
+        
+        if output is not None:
+            output.write(b"]")
         
         # Generate final validation report
         self.generate_final_report(all_results)
@@ -256,9 +297,12 @@ class FinalValidationSuite:
             print("RECOMMENDATION: DO NOT DEPLOY - Testing failed")
             return
         
+        if "concurrency" in results[0]:
+            print(f"Times measured with up to {results[0]['concurrency']} concurrent requests")
+        
         # Summary table
-        print(f"{'Size':<6} {'Original(s)':<12} {'Optimized(s)':<13} {'Speedup':<10} {'Consistent':<12} {'Max Diff':<12}")
-        print("-" * 80)
+        print(f"{'Size':<6} {'Original(s)':<12} {'Orig p95':<10} {'Optimized(s)':<13} {'Opt p95':<10} {'Speedup':<10} {'Consistent':<12} {'Max Diff':<12}")
+        print("-" * 100)
         
         total_speedup = 0
         total_consistent = 0
@@ -268,6 +312,8 @@ class FinalValidationSuite:
             size = result["recipe_size"]
             orig_avg = result["performance"]["original_avg"]
             opt_avg = result["performance"]["optimized_avg"]
+            orig_p95 = result["performance"]["original_p95"]
+            opt_p95 = result["performance"]["optimized_p95"]
             speedup = result["performance"]["avg_speedup"]
             consistent = result["consistency"]["all_identical"]
             max_diff = result["consistency"]["max_score_difference"]
@@ -276,14 +322,14 @@ class FinalValidationSuite:
             total_consistent += 1 if consistent else 0
             max_difference = max(max_difference, max_diff)
             
-            print(f"{size:<6} {orig_avg:<12.3f} {opt_avg:<13.3f} {speedup:<10.1f}x {'✅' if consistent else '❌':<12} {max_diff:<12.2e}")
+            print(f"{size:<6} {orig_avg:<12.3f} {orig_p95:<10.3f} {opt_avg:<13.3f} {opt_p95:<10.3f} {speedup:<10.1f}x {'✅' if consistent else '❌':<12} {max_diff:<12.2e}")
         
         # Overall statistics
         num_tests = len(results)
         avg_speedup = total_speedup / num_tests if num_tests > 0 else 0
         consistency_rate = (total_consistent / num_tests * 100) if num_tests > 0 else 0
         
-        print("-" * 80)
+        print("-" * 100)
         print(f"OVERALL VALIDATION RESULTS:")
         print(f"  Tests completed:     {num_tests}/{len(results)}")
         print(f"  Average speedup:     {avg_speedup:.1f}x")
@@ -296,8 +342,8 @@ class FinalValidationSuite:
             large_results = [r for r in results if r["recipe_size"] >= 10]
             
             if small_results and large_results:
-                small_speedup = statistics.mean([r["performance"]["avg_speedup"] for r in small_results])
-                large_speedup = statistics.mean([r["performance"]["avg_speedup"] for r in large_results])
+                small_speedup = float(np.mean([r["performance"]["avg_speedup"] for r in small_results]))
+                large_speedup = float(np.mean([r["performance"]["avg_speedup"] for r in large_results]))
                 
                 print(f"\nSCALING PERFORMANCE:")
                 print(f"  Small recipes (≤5 items):  {small_speedup:.1f}x average speedup")
@@ -326,12 +372,11 @@ class FinalValidationSuite:
 
 def main():
     """Run the final validation test suite."""
-    suite = FinalValidationSuite()
-    results = suite.run_comprehensive_validation()
-    
-    # Save detailed results
-    with open("/home/marius/projects/FIT_API_public/rf_performance_testing/rf_final_validation_results.json", "w") as f:
-        json.dump(results, f, indent=2)
+    # Detailed results are written incrementally as each recipe size completes
+    with open("/home/marius/projects/FIT_API_public/rf_performance_testing/rf_final_validation_results.json", "wb") as f, \
+            BenchHarness() as harness:
+        suite = FinalValidationSuite(harness)
+        suite.run_comprehensive_validation(output=f)
     
     print(f"\n📁 Detailed results saved to: rf_final_validation_results.json")
 
@@ -6,9 +6,31 @@ Tests limited scenarios to avoid timeouts while demonstrating optimization impac
 
 import json
 import time
-import requests
 
-def test_items_performance():
+from _harness import BenchHarness
+
+ORIGINAL_URL = "http://localhost:8082"
+OPTIMIZED_URL = "http://localhost:8083"
+
+
+def summarize(report):
+    """Print per-run timings of a single-payload report and return the stored results"""
+    entry = report.entries[0]
+    original, optimized = report.endpoints
+    results = {"original": entry.times(original), "optimized": entry.times(optimized)}
+
+    for name, endpoint in (("Original", original), ("Optimized", optimized)):
+        for run, call in enumerate(entry.calls[endpoint]):
+            status = f"{call.duration:.3f}s" if call.success else f"ERROR {call.error}"
+            print(f"  {name} run {run+1}: {status}")
+
+    improvement = entry.speedup(original, optimized)
+    if improvement is not None:
+        print(f"  Improvement: {improvement:.1f}x faster")
+        results["improvement"] = improvement
+    return results
+
+def test_items_performance(harness):
     """Test GET /items/ with different limits"""
     print("=== GET /items/ Performance Test ===")
     
@@ -22,50 +44,13 @@ def test_items_performance():
     
     for case in test_cases:
         print(f"\nTesting {case['name']}:")
-        case_results = {"original": [], "optimized": []}
-        
-        # Test original (port 8082) - only 1 run due to slowness
-        start = time.time()
-        try:
-            response = requests.get(f"http://localhost:8082/items/{case['params']}", timeout=30)
-            end = time.time()
-            if response.status_code == 200:
-                case_results["original"].append(end - start)
-                print(f"  Original: {end - start:.3f}s")
-            else:
-                print(f"  Original: ERROR {response.status_code}")
-        except requests.Timeout:
-            print(f"  Original: TIMEOUT (>30s)")
-        except Exception as e:
-            print(f"  Original: EXCEPTION {e}")
-        
-        # Test optimized (port 8083) - 3 runs for average
-        for run in range(3):
-            start = time.time()
-            try:
-                response = requests.get(f"http://localhost:8083/items/{case['params']}", timeout=10)
-                end = time.time()
-                if response.status_code == 200:
-                    case_results["optimized"].append(end - start)
-                    print(f"  Optimized run {run+1}: {end - start:.3f}s")
-                else:
-                    print(f"  Optimized run {run+1}: ERROR {response.status_code}")
-            except Exception as e:
-                print(f"  Optimized run {run+1}: EXCEPTION {e}")
-        
-        # Calculate improvement
-        if case_results["original"] and case_results["optimized"]:
-            orig_avg = sum(case_results["original"]) / len(case_results["original"])
-            opt_avg = sum(case_results["optimized"]) / len(case_results["optimized"])
-            improvement = orig_avg / opt_avg if opt_avg > 0 else 0
-            print(f"  Improvement: {improvement:.1f}x faster")
-            case_results["improvement"] = improvement
-            
-        results[case["name"]] = case_results
+        endpoints = [f"{ORIGINAL_URL}/items/{case['params']}", f"{OPTIMIZED_URL}/items/{case['params']}"]
+        report = harness.bench(endpoints, [None], iterations=3)
+        results[case["name"]] = summarize(report)
     
     return results
 
-def test_recipe_performance():
+def test_recipe_performance(harness):
     """Test POST /calculate-recipe/ with small recipes"""
     print("\n=== POST /calculate-recipe/ Performance Test ===")
     
@@ -91,76 +76,23 @@ def test_recipe_performance():
     ]
     
     results = {}
+    endpoints = [f"{ORIGINAL_URL}/calculate-recipe/", f"{OPTIMIZED_URL}/calculate-recipe/"]
     
     for recipe in recipes:
         print(f"\nTesting {recipe['name']}:")
-        recipe_results = {"original": [], "optimized": []}
-        
-        # Test original (port 8082) - 1 run due to potential slowness
-        start = time.time()
-        try:
-            response = requests.post(
-                "http://localhost:8082/calculate-recipe/",
-                json=recipe["data"],
-                headers={"Content-Type": "application/json"},
-                timeout=60
-            )
-            end = time.time()
-            if response.status_code == 200:
-                recipe_results["original"].append(end - start)
-                print(f"  Original: {end - start:.3f}s ✓")
-            else:
-                print(f"  Original: ERROR {response.status_code}")
-                print(f"    Response: {response.text[:100]}")
-        except requests.Timeout:
-            print(f"  Original: TIMEOUT (>60s)")
-        except Exception as e:
-            print(f"  Original: EXCEPTION {e}")
-        
-        # Test optimized (port 8083) - 3 runs
-        for run in range(3):
-            start = time.time()
-            try:
-                response = requests.post(
-                    "http://localhost:8083/calculate-recipe/",
-                    json=recipe["data"],
-                    headers={"Content-Type": "application/json"},
-                    timeout=10
-                )
-                end = time.time()
-                if response.status_code == 200:
-                    recipe_results["optimized"].append(end - start)
-                    print(f"  Optimized run {run+1}: {end - start:.3f}s ✓")
-                else:
-                    print(f"  Optimized run {run+1}: ERROR {response.status_code}")
-            except Exception as e:
-                print(f"  Optimized run {run+1}: EXCEPTION {e}")
-        
-        # Calculate improvement
-        if recipe_results["original"] and recipe_results["optimized"]:
-            orig_avg = sum(recipe_results["original"]) / len(recipe_results["original"])
-            opt_avg = sum(recipe_results["optimized"]) / len(recipe_results["optimized"])
-            improvement = orig_avg / opt_avg if opt_avg > 0 else 0
-            print(f"  Improvement: {improvement:.1f}x faster")
-            recipe_results["improvement"] = improvement
-            
-        results[recipe["name"]] = recipe_results
+        report = harness.bench(endpoints, [recipe["data"]], iterations=3)
+        results[recipe["name"]] = summarize(report)
     
     return results
 
-def test_consistency():
+def test_consistency(harness):
     """Test result consistency between containers"""
     print("\n=== Result Consistency Test ===")
     
     # Test small items set
-    try:
-        orig_items = requests.get("http://localhost:8082/items/?limit=3", timeout=30).json()
-        opt_items = requests.get("http://localhost:8083/items/?limit=3", timeout=10).json()
-        items_identical = orig_items == opt_items
-        print(f"Items consistency (3 items): {'✅ IDENTICAL' if items_identical else '❌ DIFFERENT'}")
-    except Exception as e:
-        print(f"Items consistency test: ERROR {e}")
-        items_identical = False
+    items_report = harness.bench([f"{ORIGINAL_URL}/items/?limit=3", f"{OPTIMIZED_URL}/items/?limit=3"], [None], iterations=1)
+    items_identical = bool(items_report.entries[0].consistent(*items_report.endpoints))
+    print(f"Items consistency (3 items): {'✅ IDENTICAL' if items_identical else '❌ DIFFERENT'}")
     
     # Test simple recipe
     recipe_data = {
@@ -168,30 +100,14 @@ def test_consistency():
         "weighting_scheme_name": "delphi_r0110"
     }
     
-    try:
-        orig_recipe = requests.post(
-            "http://localhost:8082/calculate-recipe/",
-            json=recipe_data,
-            headers={"Content-Type": "application/json"},
-            timeout=60
-        )
-        opt_recipe = requests.post(
-            "http://localhost:8083/calculate-recipe/",
-            json=recipe_data,
-            headers={"Content-Type": "application/json"},
-            timeout=10
-        )
-        
-        if orig_recipe.status_code == 200 and opt_recipe.status_code == 200:
-            recipe_identical = orig_recipe.json() == opt_recipe.json()
-            print(f"Recipe consistency (1 item): {'✅ IDENTICAL' if recipe_identical else '❌ DIFFERENT'}")
-        else:
-            print(f"Recipe consistency: ERROR - Original: {orig_recipe.status_code}, Optimized: {opt_recipe.status_code}")
-            recipe_identical = False
-            
-    except Exception as e:
-        print(f"Recipe consistency test: ERROR {e}")
-        recipe_identical = False
+    recipe_report = harness.bench([f"{ORIGINAL_URL}/calculate-recipe/", f"{OPTIMIZED_URL}/calculate-recipe/"], [recipe_data], iterations=1)
+    recipe_consistent = recipe_report.entries[0].consistent(*recipe_report.endpoints)
+    if recipe_consistent is None:
+        original_call, optimized_call = (recipe_report.entries[0].calls[endpoint][0] for endpoint in recipe_report.endpoints)
+        print(f"Recipe consistency: ERROR - Original: {original_call.status_code}, Optimized: {optimized_call.status_code}")
+    else:
+        print(f"Recipe consistency (1 item): {'✅ IDENTICAL' if recipe_consistent else '❌ DIFFERENT'}")
+    recipe_identical = bool(recipe_consistent)
     
     return {"items_identical": items_identical, "recipe_identical": recipe_identical}
 
@@ -204,9 +120,10 @@ def main():
     print("=" * 80)
     
     # Run tests
-    items_results = test_items_performance()
-    recipe_results = test_recipe_performance()
-    consistency_results = test_consistency()
+    with BenchHarness(timeout=60) as harness:
+        items_results = test_items_performance(harness)
+        recipe_results = test_recipe_performance(harness)
+        consistency_results = test_consistency(harness)
     
     # Summary
     print("\n" + "=" * 80)
@@ -6,13 +6,21 @@ Tests with different recipe sizes to better demonstrate N+1 query impact
 
 import time
 import json
-import urllib.request
-import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 import sys
 
+import numpy as np
+import pandas as pd
+import urllib3
+
+# Shared keep-alive connection pool for both containers (thread-safe, one pool per host)
+POOL = urllib3.PoolManager(num_pools=2, maxsize=8, retries=False)
+JSON_HEADERS = {"Content-Type": "application/json", "Connection": "keep-alive"}
+
 # Larger set of valid item IDs for testing
-VALID_ITEMS = [
+VALID_ITEMS = (
     "25541-FRA",  # Lamb on skewer
     "25505-FRA",  # Beef on skewer
     "42200-FRA",  # Soy lecithin
@@ -33,41 +41,57 @@ VALID_ITEMS = [
     "18022-LKA",  # Infusion, brewed, without sugar
     "20282-FRA",  # Asparagus, white or purple, peeled, raw
     "20279-FRA",  # Asparagus, green, raw
-]
+)
+
+@dataclass
+class BenchRecord:
+    """A single timed request of one recipe size against one variant"""
+    size: int
+    variant: str
+    duration: float
+    success: bool
+    response_size: int = 0
+
+    @classmethod
+    def from_result(cls, size, variant, result):
+        return cls(size, variant, result.get('duration', float('nan')), result['success'], result.get('response_size', 0))
 
-def test_calculate_endpoint(url, payload, test_name):
-    """Test the POST /calculate-recipe/ endpoint and measure performance"""
+def test_calculate_endpoint(url, body_bytes, headers, recipe_items, test_name):
+    """Test the POST /calculate-recipe/ endpoint with a pre-encoded body and prebuilt headers and measure performance"""
     
     print(f"Testing: {test_name}")
     print(f"Endpoint: {url}")
-    print(f"Items: {len(payload['items'])}")
+    print(f"Items: {recipe_items}")
     print(f"Test started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("-" * 50)
     
     try:
-        # Prepare request
-        data = json.dumps(payload).encode('utf-8')
-        req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+        # Record start time (monotonic, nanosecond resolution)
+        start_ns = time.perf_counter_ns()
         
-        # Record start time
-        start_time = time.time()
-        
-        # Make the request
-        with urllib.request.urlopen(req) as response:
-            response_data = response.read().decode('utf-8')
+        # Make the request over the pooled keep-alive connection
+        response = POOL.request('POST', url, body=body_bytes, headers=headers, preload_content=False)
+        response_data = response.read()  # raw bytes only inside the timing window
             
-        # Record end time
-        end_time = time.time()
-        
-        # Calculate duration
-        duration = end_time - start_time
+        # Calculate duration in seconds
+        duration = (time.perf_counter_ns() - start_ns) / 1e9
+        response.release_conn()
+        
+        # Check status and parse response after timing
+        if response.status != 200:
+            print(f"❌ HTTP ERROR")
+            print(f"Status code: {response.status}")
+            print(f"Response: {response_data.decode('utf-8', errors='replace')[:500]}...")  # Truncate long errors
+            return {
+                'success': False,
+                'status_code': response.status,
+                'error': 'HTTP Error'
+            }
         
-        # Parse response
         result = json.loads(response_data)
         
         # Extract key metrics
         has_recipe_totals = 'Recipe Info' in result
-        recipe_items = len(payload['items'])
         
         # Display results
         print(f"✅ SUCCESS")
@@ -91,18 +115,7 @@ def test_calculate_endpoint(url, payload, test_name):
             'has_recipe_totals': has_recipe_totals
         }
             
-    except urllib.error.HTTPError as e:
-        print(f"❌ HTTP ERROR")
-        print(f"Status code: {e.code}")
-        error_response = e.read().decode('utf-8')
-        print(f"Response: {error_response[:500]}...")  # Truncate long errors
-        return {
-            'success': False,
-            'status_code': e.code,
-            'error': 'HTTP Error'
-        }
-        
-    except urllib.error.URLError as e:
+    except urllib3.exceptions.HTTPError as e:
         print(f"❌ CONNECTION ERROR")
         print(f"Could not connect to {url}")
         return {
@@ -122,13 +135,8 @@ def generate_recipe(num_items):
     if num_items > len(VALID_ITEMS):
         raise ValueError(f"Cannot create recipe with {num_items} items. Only {len(VALID_ITEMS)} valid items available.")
     
-    recipe = {}
-    for i in range(num_items):
-        # Vary amounts to make it realistic (20g to 500g)
-        amount = 0.02 + (i * 0.024)  # 20g, 44g, 68g, etc.
-        recipe[VALID_ITEMS[i]] = round(amount, 3)
-    
-    return {"items": recipe}
+    # Vary amounts to make it realistic: 20g, 44g, 68g, etc.
+    return {"items": {item_id: round(0.02 + i * 0.024, 3) for i, item_id in enumerate(VALID_ITEMS[:num_items])}}
 
 def compare_recipe_sizes():
     """Compare performance across different recipe sizes"""
@@ -139,93 +147,100 @@ def compare_recipe_sizes():
     print("RECIPE SIZE PERFORMANCE ANALYSIS")
     print("=" * 80)
     
-    results = {
-        'original': {},
-        'optimized': {}
-    }
+    records = []
     
+    # Build and encode each recipe once, with its Content-Length header; both endpoints reuse them
+    prebuilt = {}
     for size in recipe_sizes:
-        print(f"\n{'='*60}")
-        print(f"TESTING RECIPE SIZE: {size} ITEMS")
-        print(f"{'='*60}")
-        
-        # Generate recipe
-        recipe_payload = generate_recipe(size)
-        
-        # Test original (port 8080)
-        print(f"\n[ORIGINAL] Port 8080 - {size} items:")
-        result_original = test_calculate_endpoint(
-            "http://localhost:8080/calculate-recipe/", 
-            recipe_payload, 
-            f"{size}-Item Recipe (Original)"
-        )
-        results['original'][size] = result_original
-        
-        print("\n" + "-" * 40)
-        
-        # Test optimized (port 8081)
-        print(f"\n[OPTIMIZED] Port 8081 - {size} items:")
-        result_optimized = test_calculate_endpoint(
-            "http://localhost:8081/calculate-recipe/", 
-            recipe_payload, 
-            f"{size}-Item Recipe (Optimized)"
-        )
-        results['optimized'][size] = result_optimized
-        
-        # Comparison for this size
-        if result_original['success'] and result_optimized['success']:
-            improvement = result_original['duration'] / result_optimized['duration']
-            print(f"\n📊 COMPARISON FOR {size} ITEMS:")
-            print(f"Original:  {result_original['duration']:.3f}s")
-            print(f"Optimized: {result_optimized['duration']:.3f}s")
-            if improvement > 1:
-                print(f"Improvement: {improvement:.1f}x faster")
-            else:
-                print(f"Regression: {1/improvement:.1f}x slower")
-        
-        # Add delay between recipe sizes
-        time.sleep(1)
+        payload = generate_recipe(size)
+        body_bytes = json.dumps(payload).encode('utf-8')
+        prebuilt[size] = (payload, body_bytes, {**JSON_HEADERS, "Content-Length": str(len(body_bytes))})
+    
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        for size in recipe_sizes:
+            print(f"\n{'='*60}")
+            print(f"TESTING RECIPE SIZE: {size} ITEMS")
+            print(f"{'='*60}")
+            
+            recipe_payload, body_bytes, headers = prebuilt[size]
+            
+            # Test original (port 8080) and optimized (port 8081) concurrently
+            print(f"\n[ORIGINAL] Port 8080 / [OPTIMIZED] Port 8081 - {size} items:")
+            future_original = executor.submit(
+                test_calculate_endpoint,
+                "http://localhost:8080/calculate-recipe/", 
+                body_bytes, 
+                headers, 
+                len(recipe_payload['items']), 
+                f"{size}-Item Recipe (Original)"
+            )
+            future_optimized = executor.submit(
+                test_calculate_endpoint,
+                "http://localhost:8081/calculate-recipe/", 
+                body_bytes, 
+                headers, 
+                len(recipe_payload['items']), 
+                f"{size}-Item Recipe (Optimized)"
+            )
+            result_original = future_original.result()
+            result_optimized = future_optimized.result()
+            records.append(BenchRecord.from_result(size, 'original', result_original))
+            records.append(BenchRecord.from_result(size, 'optimized', result_optimized))
+            
+            # Comparison for this size
+            if result_original['success'] and result_optimized['success']:
+                improvement = result_original['duration'] / result_optimized['duration']
+                print(f"\n📊 COMPARISON FOR {size} ITEMS:")
+                print(f"Original:  {result_original['duration']:.3f}s")
+                print(f"Optimized: {result_optimized['duration']:.3f}s")
+                if improvement > 1:
+                    print(f"Improvement: {improvement:.1f}x faster")
+                else:
+                    print(f"Regression: {1/improvement:.1f}x slower")
+    
+    # Final summary: median duration per size and variant, improvement as a vectorized ratio
+    df = pd.DataFrame(records)
+    df.to_csv('bench_results.csv', index=False)
+    summary = (
+        df[df.success]
+        .groupby(['size', 'variant']).duration.median()
+        .unstack()
+        .reindex(index=recipe_sizes, columns=['original', 'optimized'])
+    )
+    summary['improvement'] = summary['original'] / summary['optimized']
     
-    # Final summary
     print("\n" + "=" * 80)
     print("FINAL PERFORMANCE SUMMARY")
     print("=" * 80)
     print(f"{'Size':<6} {'Original':<12} {'Optimized':<12} {'Improvement':<12} {'Status'}")
     print("-" * 60)
     
-    for size in recipe_sizes:
-        orig = results['original'][size]
-        opt = results['optimized'][size]
-        
-        if orig['success'] and opt['success']:
-            improvement = orig['duration'] / opt['duration']
+    for size, row in summary.iterrows():
+        if pd.notna(row['improvement']):
+            improvement = row['improvement']
             status = f"{improvement:.1f}x" if improvement > 1 else f"{1/improvement:.1f}x slower"
-            print(f"{size:<6} {orig['duration']:<12.3f} {opt['duration']:<12.3f} {improvement:<12.1f} {status}")
+            print(f"{size:<6} {row['original']:<12.3f} {row['optimized']:<12.3f} {improvement:<12.1f} {status}")
         else:
             print(f"{size:<6} {'ERROR':<12} {'ERROR':<12} {'N/A':<12} {'FAILED'}")
     
-    return results
+    print("\nPer-request records saved to: bench_results.csv")
+    
+    return summary
 
 if __name__ == "__main__":
     print("FIT API /calculate-recipe/ Performance Testing - Multiple Recipe Sizes")
     print("Testing recipe sizes from 1 to 20 items to demonstrate N+1 query impact")
     
     try:
-        results = compare_recipe_sizes()
+        summary = compare_recipe_sizes()
         
-        # Calculate average improvement
-        successful_comparisons = []
-        for size in [1, 3, 5, 10, 15, 20]:
-            orig = results['original'][size]
-            opt = results['optimized'][size]
-            if orig['success'] and opt['success']:
-                improvement = orig['duration'] / opt['duration']
-                successful_comparisons.append(improvement)
+        # Calculate average improvement; the geometric mean is the correct average for ratios
+        successful_comparisons = summary['improvement'].dropna().to_numpy()
         
-        if successful_comparisons:
-            avg_improvement = sum(successful_comparisons) / len(successful_comparisons)
-            print(f"\n🎯 AVERAGE IMPROVEMENT: {avg_improvement:.1f}x faster")
-            print(f"📈 SCALING ANALYSIS: {len(successful_comparisons)}/{len([1, 3, 5, 10, 15, 20])} recipe sizes tested successfully")
+        if successful_comparisons.size:
+            avg_improvement = float(np.exp(np.mean(np.log(successful_comparisons))))
+            print(f"\n🎯 AVERAGE IMPROVEMENT (geometric mean): {avg_improvement:.1f}x faster")
+            print(f"📈 SCALING ANALYSIS: {successful_comparisons.size}/{len(summary)} recipe sizes tested successfully")
         
     except KeyboardInterrupt:
         print("\n\nTesting interrupted by user")
@@ -9,40 +9,134 @@ Tests performance and result consistency between:
 This should demonstrate the full optimization impact with the new database.
 """
 
-import json
+import asyncio
+import functools
+import os
 import time
 import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Tuple, Any
-import requests
+import httpx
+import numpy as np
+import orjson
+
+# Send one untimed request per endpoint and scenario before measuring; disable for cold-start numbers
+WARMUP = True
+
+def make_client() -> httpx.Client:
+    """Build a keep-alive client with a small connection pool"""
+    return httpx.Client(
+        timeout=30.0,
+        limits=httpx.Limits(max_keepalive_connections=16),
+        headers={"Connection": "keep-alive"},
+    )
+
+def pin_benchmark_process() -> None:
+    """Pin the benchmark client to the last CPU and raise its priority to reduce timing jitter.
+
+    The servers under test should be pinned to other CPUs so the client never steals
+    cycles from the measured processes. Silently skipped where not permitted or supported.
+    """
+    try:
+        os.sched_setaffinity(0, {os.cpu_count() - 1})
+    except (PermissionError, AttributeError, OSError):
+        pass
+    try:
+        os.nice(-5)
+    except (PermissionError, AttributeError, OSError):
+        pass
+
+def summarize_times(times: List[float]) -> Dict[str, float]:
+    """Outlier-robust statistics over all measured run times; the median is used for improvement ratios"""
+    return {
+        "median_time": statistics.median(times),
+        "mean_time": statistics.mean(times),
+        "min_time": min(times),
+        "p95_time": statistics.quantiles(times, n=20)[-1] if len(times) >= 5 else max(times),
+    }
+
+def improvement_table(tests: Dict[str, Any]) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """Median times of every scenario measured on both variants, plus their improvement ratios"""
+    names = [
+        name for name, data in tests.items()
+        if "median_time" in data.get("original", {}) and "median_time" in data.get("optimized", {})
+    ]
+    orig = np.array([tests[name]["original"]["median_time"] for name in names])
+    opt = np.array([tests[name]["optimized"]["median_time"] for name in names])
+    return names, orig, opt, orig / opt
+
+def geometric_mean(ratios: np.ndarray) -> float:
+    """Geometric mean, the appropriate average for ratios"""
+    return float(np.exp(np.mean(np.log(ratios))))
+
+def canonicalize(body: bytes) -> Tuple[Any, bytes]:
+    """Parse a JSON body and re-serialize it with sorted keys so equal documents compare equal as bytes"""
+    data = orjson.loads(body)
+    return data, orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+
+# Test items from rf_test_20_items_summary.md
+TEST_ITEMS = (
+    "11032-FRA",  # Basil, dried
+    "11045-BRA",  # Baker's yeast, dehydrated  
+    "11163-ESP",  # Sweet and sour sauce, prepacked
+    "12737-FRA",  # Mimolette cheese, half-old
+    "12834-FRA",  # Crottin de Chavignol cheese
+    "13731-FRA",  # Peach, canned in light syrup
+    "15006-FRA",  # Coconut, ripe kernel, fresh
+    "19026-FRA",  # Condensed milk, without sugar
+    "20039-FRA",  # Leek, raw
+    "20904-FRA",  # Tofu, plain
+    "25123-FRA",  # Moussaka
+    "26091-FRA",  # Mullet, raw
+    "26270-FRA",  # Pizza, tuna
+    "31102-FRA",  # Cereal bar with chocolate
+    "4020-FRA",   # Dauphine potato, frozen, raw
+    "51510-FRA",  # Frik (crushed immature durum wheat)
+    "7650-FRA",   # Croissant w almonds, from bakery
+    "9380-FRA",   # Buckwheat, whole, raw
+    "9621-FRA",   # Wheat bran
+    "9640-FRA",   # Oat bran
+)
+
+# Recipe scenarios for POST /calculate-recipe/, keyed by name
+RECIPES_BY_NAME = {
+    "single_item": [{"item_id": "11032-FRA", "amount": 100}],
+    "small_recipe_5_items": [
+        {"item_id": item_id, "amount": 100 + i * 25}
+        for i, item_id in enumerate(TEST_ITEMS[:5])
+    ],
+    "medium_recipe_10_items": [
+        {"item_id": item_id, "amount": 100 + i * 10}
+        for i, item_id in enumerate(TEST_ITEMS[:10])
+    ],
+    "large_recipe_20_items": [
+        {"item_id": item_id, "amount": 50 + i * 5}
+        for i, item_id in enumerate(TEST_ITEMS)
+    ],
+}
+
+@functools.lru_cache(maxsize=None)
+def request_template(base_url: str, recipe_name: str) -> Tuple[str, bytes, Dict[str, str]]:
+    """Build (url, body, headers) for a recipe request once per endpoint and recipe"""
+    body = orjson.dumps({"items": RECIPES_BY_NAME[recipe_name], "weighting_scheme_name": "delphi_r0110"})
+    return f"{base_url}/calculate-recipe/", body, {"Content-Type": "application/json", "Connection": "keep-alive"}
 
 class NewDatabaseComparisonTest:
     def __init__(self):
         self.original_url = "http://localhost:8082"  # Original code + New DB
         self.optimized_url = "http://localhost:8083"  # Optimized code + New DB
         
-        # Test items from rf_test_20_items_summary.md
-        self.test_items = [
-            "11032-FRA",  # Basil, dried
-            "11045-BRA",  # Baker's yeast, dehydrated  
-            "11163-ESP",  # Sweet and sour sauce, prepacked
-            "12737-FRA",  # Mimolette cheese, half-old
-            "12834-FRA",  # Crottin de Chavignol cheese
-            "13731-FRA",  # Peach, canned in light syrup
-            "15006-FRA",  # Coconut, ripe kernel, fresh
-            "19026-FRA",  # Condensed milk, without sugar
-            "20039-FRA",  # Leek, raw
-            "20904-FRA",  # Tofu, plain
-            "25123-FRA",  # Moussaka
-            "26091-FRA",  # Mullet, raw
-            "26270-FRA",  # Pizza, tuna
-            "31102-FRA",  # Cereal bar with chocolate
-            "4020-FRA",   # Dauphine potato, frozen, raw
-            "51510-FRA",  # Frik (crushed immature durum wheat)
-            "7650-FRA",   # Croissant w almonds, from bakery
-            "9380-FRA",   # Buckwheat, whole, raw
-            "9621-FRA",   # Wheat bran
-            "9640-FRA",   # Oat bran
-        ]
+        # One keep-alive client per container so both can be benchmarked concurrently
+        self.orig_client = make_client()
+        self.opt_client = make_client()
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        
+        self.test_items = TEST_ITEMS
+        
+        # Every measurement is streamed here while the suite runs, so partial runs keep their data
+        self.out = open("rf_performance_testing/rf_new_database_comparison_results.ndjson", "wb", buffering=0)
+        self.out_lock = threading.Lock()
         
         self.results = {
             "test_timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
@@ -55,8 +149,62 @@ class NewDatabaseComparisonTest:
             "consistency_tests": {}
         }
 
-    def test_get_items_performance(self) -> Dict[str, Any]:
-        """Test GET /items/ endpoint performance"""
+    def record_measurement(self, test: str, scenario: str, variant: str, run: int, duration_s: float, status: Any) -> None:
+        """Append one measurement to the NDJSON stream as soon as it is taken"""
+        line = orjson.dumps({
+            "ts": time.time(),
+            "test": test,
+            "scenario": scenario,
+            "variant": variant,
+            "run": run,
+            "duration_s": duration_s,
+            "status": status,
+        }) + b"\n"
+        with self.out_lock:
+            self.out.write(line)
+
+    def time_post_runs(self, client: httpx.Client, url: str, body: bytes, headers: Dict[str, str], scenario: str, variant: str, runs: int = 7) -> Dict[str, Any]:
+        """Time repeated POST requests of a pre-encoded body against one endpoint"""
+        variant_results = {"times": [], "success_count": 0}
+        label = variant.capitalize()
+        
+        if WARMUP:
+            try:
+                client.post(url, content=body, headers=headers)
+            except Exception as e:
+                print(f"  {label} warmup: EXCEPTION {e}")
+        
+        for run in range(runs):
+            start_ns = time.perf_counter_ns()
+            try:
+                response = client.post(url, content=body, headers=headers)
+                response_time = (time.perf_counter_ns() - start_ns) / 1e9
+                variant_results["times"].append(response_time)
+                self.record_measurement("calculate_recipe", scenario, variant, run, response_time, response.status_code)
+                
+                if response.status_code == 200:
+                    variant_results["success_count"] += 1
+                    print(f"  {label} run {run+1}: {response_time:.3f}s ✓")
+                else:
+                    print(f"  {label} run {run+1}: {response_time:.3f}s ERROR {response.status_code}")
+                    
+            except Exception as e:
+                response_time = (time.perf_counter_ns() - start_ns) / 1e9
+                variant_results["times"].append(response_time)
+                self.record_measurement("calculate_recipe", scenario, variant, run, response_time, "exception")
+                print(f"  {label} run {run+1}: {response_time:.3f}s EXCEPTION")
+        
+        return variant_results
+
+    async def timed_get(self, client: httpx.AsyncClient, url: str) -> Tuple[int, int, bytes]:
+        """Time a single GET request, returning (duration_ns, status_code, body)"""
+        start_ns = time.perf_counter_ns()
+        response = await client.get(url)
+        body = response.content  # full body is read before the clock stops
+        return time.perf_counter_ns() - start_ns, response.status_code, body
+
+    async def test_get_items_performance(self) -> Dict[str, Any]:
+        """Test GET /items/ endpoint performance, issuing all runs of all scenarios concurrently"""
         print("\n=== Testing GET /items/ Performance ===")
         
         # Test different pagination scenarios
@@ -65,187 +213,105 @@ class NewDatabaseComparisonTest:
             {"name": "first_100", "params": "?limit=100"},
             {"name": "items_500_1000", "params": "?skip=500&limit=500"},
         ]
+        base_urls = {"original": self.original_url, "optimized": self.optimized_url}
+        combos = [
+            (scenario, variant, run)
+            for scenario in test_scenarios for variant in base_urls for run in range(3)
+        ]
         
-        results = {}
+        async with httpx.AsyncClient(timeout=30.0, limits=httpx.Limits(max_connections=32)) as client:
+            if WARMUP:
+                await asyncio.gather(*(
+                    client.get(f"{base_url}/items/{scenario['params']}")
+                    for scenario in test_scenarios for base_url in base_urls.values()
+                ), return_exceptions=True)
+            outcomes = await asyncio.gather(*(
+                self.timed_get(client, f"{base_urls[variant]}/items/{scenario['params']}")
+                for scenario, variant, _ in combos
+            ), return_exceptions=True)
         
-        for scenario in test_scenarios:
-            print(f"\nTesting {scenario['name']}...")
-            scenario_results = {
-                "original": {"times": [], "response_size": 0, "item_count": 0},
-                "optimized": {"times": [], "response_size": 0, "item_count": 0}
+        results = {
+            scenario["name"]: {
+                variant: {"times": [], "response_size": 0, "item_count": 0} for variant in base_urls
             }
+            for scenario in test_scenarios
+        }
+        
+        for (scenario, variant, run), outcome in zip(combos, outcomes):
+            variant_results = results[scenario["name"]][variant]
+            label = f"{scenario['name']} {variant.capitalize()} run {run+1}"
+            if isinstance(outcome, Exception):
+                self.record_measurement("get_items", scenario["name"], variant, run, None, "exception")
+                print(f"  {label}: EXCEPTION {outcome}")
+                continue
             
-            # Test original endpoint (port 8082)
-            for run in range(3):
-                start_time = time.time()
-                try:
-                    response = requests.get(f"{self.original_url}/items/{scenario['params']}")
-                    end_time = time.time()
-                    
-                    if response.status_code == 200:
-                        response_time = end_time - start_time
-                        scenario_results["original"]["times"].append(response_time)
-                        if run == 0:  # Only count size once
-                            data = response.json()
-                            scenario_results["original"]["response_size"] = len(response.text)
-                            scenario_results["original"]["item_count"] = len(data) if isinstance(data, dict) else 0
-                        print(f"  Original run {run+1}: {response_time:.3f}s")
-                    else:
-                        print(f"  Original run {run+1}: ERROR {response.status_code}")
-                except Exception as e:
-                    print(f"  Original run {run+1}: EXCEPTION {e}")
+            duration_ns, status_code, body = outcome
+            self.record_measurement("get_items", scenario["name"], variant, run, duration_ns / 1e9, status_code)
+            if status_code == 200:
+                response_time = duration_ns / 1e9
+                variant_results["times"].append(response_time)
+                if not variant_results["response_size"]:  # Only count size once
+                    data = orjson.loads(body)
+                    variant_results["response_size"] = len(body)
+                    variant_results["item_count"] = len(data) if isinstance(data, dict) else 0
+                print(f"  {label}: {response_time:.3f}s")
+            else:
+                print(f"  {label}: ERROR {status_code}")
+        
+        for scenario in test_scenarios:
+            scenario_results = results[scenario["name"]]
             
-            # Test optimized endpoint (port 8083)
-            for run in range(3):
-                start_time = time.time()
-                try:
-                    response = requests.get(f"{self.optimized_url}/items/{scenario['params']}")
-                    end_time = time.time()
-                    
-                    if response.status_code == 200:
-                        response_time = end_time - start_time
-                        scenario_results["optimized"]["times"].append(response_time)
-                        if run == 0:  # Only count size once
-                            data = response.json()
-                            scenario_results["optimized"]["response_size"] = len(response.text)
-                            scenario_results["optimized"]["item_count"] = len(data) if isinstance(data, dict) else 0
-                        print(f"  Optimized run {run+1}: {response_time:.3f}s")
-                    else:
-                        print(f"  Optimized run {run+1}: ERROR {response.status_code}")
-                except Exception as e:
-                    print(f"  Optimized run {run+1}: EXCEPTION {e}")
-                    
             # Calculate averages
             if scenario_results["original"]["times"]:
-                scenario_results["original"]["avg_time"] = statistics.mean(scenario_results["original"]["times"])
+                scenario_results["original"].update(summarize_times(scenario_results["original"]["times"]))
             if scenario_results["optimized"]["times"]:
-                scenario_results["optimized"]["avg_time"] = statistics.mean(scenario_results["optimized"]["times"])
+                scenario_results["optimized"].update(summarize_times(scenario_results["optimized"]["times"]))
                 
             # Calculate improvement ratio
             if (scenario_results["original"]["times"] and 
                 scenario_results["optimized"]["times"] and
-                scenario_results["optimized"]["avg_time"] > 0):
+                scenario_results["optimized"]["median_time"] > 0):
                 scenario_results["improvement_ratio"] = (
-                    scenario_results["original"]["avg_time"] / scenario_results["optimized"]["avg_time"]
+                    scenario_results["original"]["median_time"] / scenario_results["optimized"]["median_time"]
                 )
             
-            results[scenario["name"]] = scenario_results
-            
         return results
 
     def test_calculate_recipe_performance(self) -> Dict[str, Any]:
         """Test POST /calculate-recipe/ endpoint performance with different recipe sizes"""
         print("\n=== Testing POST /calculate-recipe/ Performance ===")
         
-        test_recipes = [
-            {
-                "name": "single_item",
-                "items": [{"item_id": "11032-FRA", "amount": 100}]
-            },
-            {
-                "name": "small_recipe_5_items", 
-                "items": [
-                    {"item_id": item_id, "amount": 100 + i * 25} 
-                    for i, item_id in enumerate(self.test_items[:5])
-                ]
-            },
-            {
-                "name": "medium_recipe_10_items",
-                "items": [
-                    {"item_id": item_id, "amount": 100 + i * 10}
-                    for i, item_id in enumerate(self.test_items[:10])
-                ]
-            },
-            {
-                "name": "large_recipe_20_items",
-                "items": [
-                    {"item_id": item_id, "amount": 50 + i * 5}
-                    for i, item_id in enumerate(self.test_items)
-                ]
-            }
-        ]
-        
         results = {}
         
-        for recipe in test_recipes:
-            print(f"\nTesting {recipe['name']} ({len(recipe['items'])} items)...")
-            
-            recipe_data = {
-                "items": recipe["items"],
-                "weighting_scheme_name": "delphi_r0110"
-            }
+        for name, items in RECIPES_BY_NAME.items():
+            print(f"\nTesting {name} ({len(items)} items)...")
             
+            # Run original (port 8082) and optimized (port 8083) concurrently
+            original_future = self.executor.submit(
+                self.time_post_runs, self.orig_client, *request_template(self.original_url, name), name, "original"
+            )
+            optimized_future = self.executor.submit(
+                self.time_post_runs, self.opt_client, *request_template(self.optimized_url, name), name, "optimized"
+            )
             recipe_results = {
-                "original": {"times": [], "success_count": 0},
-                "optimized": {"times": [], "success_count": 0}
+                "original": original_future.result(),
+                "optimized": optimized_future.result()
             }
             
-            # Test original endpoint (port 8082)
-            for run in range(5):
-                start_time = time.time()
-                try:
-                    response = requests.post(
-                        f"{self.original_url}/calculate-recipe/",
-                        json=recipe_data,
-                        headers={"Content-Type": "application/json"}
-                    )
-                    end_time = time.time()
-                    
-                    response_time = end_time - start_time
-                    recipe_results["original"]["times"].append(response_time)
-                    
-                    if response.status_code == 200:
-                        recipe_results["original"]["success_count"] += 1
-                        print(f"  Original run {run+1}: {response_time:.3f}s ✓")
-                    else:
-                        print(f"  Original run {run+1}: {response_time:.3f}s ERROR {response.status_code}")
-                        
-                except Exception as e:
-                    end_time = time.time()
-                    response_time = end_time - start_time
-                    recipe_results["original"]["times"].append(response_time)
-                    print(f"  Original run {run+1}: {response_time:.3f}s EXCEPTION")
-            
-            # Test optimized endpoint (port 8083)
-            for run in range(5):
-                start_time = time.time()
-                try:
-                    response = requests.post(
-                        f"{self.optimized_url}/calculate-recipe/",
-                        json=recipe_data,
-                        headers={"Content-Type": "application/json"}
-                    )
-                    end_time = time.time()
-                    
-                    response_time = end_time - start_time
-                    recipe_results["optimized"]["times"].append(response_time)
-                    
-                    if response.status_code == 200:
-                        recipe_results["optimized"]["success_count"] += 1
-                        print(f"  Optimized run {run+1}: {response_time:.3f}s ✓")
-                    else:
-                        print(f"  Optimized run {run+1}: {response_time:.3f}s ERROR {response.status_code}")
-                        
-                except Exception as e:
-                    end_time = time.time()
-                    response_time = end_time - start_time
-                    recipe_results["optimized"]["times"].append(response_time)
-                    print(f"  Optimized run {run+1}: {response_time:.3f}s EXCEPTION")
-            
             # Calculate averages and improvement
             if recipe_results["original"]["times"]:
-                recipe_results["original"]["avg_time"] = statistics.mean(recipe_results["original"]["times"])
+                recipe_results["original"].update(summarize_times(recipe_results["original"]["times"]))
             if recipe_results["optimized"]["times"]:
-                recipe_results["optimized"]["avg_time"] = statistics.mean(recipe_results["optimized"]["times"])
+                recipe_results["optimized"].update(summarize_times(recipe_results["optimized"]["times"]))
                 
             if (recipe_results["original"]["times"] and 
                 recipe_results["optimized"]["times"] and
-                recipe_results["optimized"]["avg_time"] > 0):
+                recipe_results["optimized"]["median_time"] > 0):
                 recipe_results["improvement_ratio"] = (
-                    recipe_results["original"]["avg_time"] / recipe_results["optimized"]["avg_time"]
+                    recipe_results["original"]["median_time"] / recipe_results["optimized"]["median_time"]
                 )
             
-            results[recipe["name"]] = recipe_results
+            results[name] = recipe_results
             
         return results
 
@@ -266,11 +332,15 @@ class NewDatabaseComparisonTest:
         
         # Test GET /items/ consistency (first 10 items)
         try:
-            original_items = requests.get(f"{self.original_url}/items/?limit=10").json()
-            optimized_items = requests.get(f"{self.optimized_url}/items/?limit=10").json()
+            original_items, original_canon = canonicalize(
+                self.orig_client.get(f"{self.original_url}/items/?limit=10").content
+            )
+            optimized_items, optimized_canon = canonicalize(
+                self.opt_client.get(f"{self.optimized_url}/items/?limit=10").content
+            )
             
             results["items_consistency"] = {
-                "identical": original_items == optimized_items,
+                "identical": original_canon == optimized_canon,
                 "original_count": len(original_items) if isinstance(original_items, dict) else 0,
                 "optimized_count": len(optimized_items) if isinstance(optimized_items, dict) else 0
             }
@@ -280,12 +350,12 @@ class NewDatabaseComparisonTest:
         
         # Test recipe calculation consistency
         try:
-            original_response = requests.post(
+            original_response = self.orig_client.post(
                 f"{self.original_url}/calculate-recipe/",
                 json=test_recipe,
                 headers={"Content-Type": "application/json"}
             )
-            optimized_response = requests.post(
+            optimized_response = self.opt_client.post(
                 f"{self.optimized_url}/calculate-recipe/",
                 json=test_recipe,
                 headers={"Content-Type": "application/json"}
@@ -295,11 +365,11 @@ class NewDatabaseComparisonTest:
             optimized_success = optimized_response.status_code == 200
             
             if original_success and optimized_success:
-                original_data = original_response.json()
-                optimized_data = optimized_response.json()
+                _, original_canon = canonicalize(original_response.content)
+                _, optimized_canon = canonicalize(optimized_response.content)
                 results["recipe_consistency"] = {
                     "both_successful": True,
-                    "identical": original_data == optimized_data,
+                    "identical": original_canon == optimized_canon,
                     "original_status": original_response.status_code,
                     "optimized_status": optimized_response.status_code
                 }
@@ -319,6 +389,8 @@ class NewDatabaseComparisonTest:
 
     def run_comprehensive_test(self) -> None:
         """Run all tests and generate comprehensive report"""
+        pin_benchmark_process()
+        
         print("=" * 80)
         print("NEW DATABASE PERFORMANCE COMPARISON TEST")
         print("=" * 80)
@@ -327,18 +399,23 @@ class NewDatabaseComparisonTest:
         print("=" * 80)
         
         # Run all tests
-        self.results["get_items_tests"] = self.test_get_items_performance()
+        self.results["get_items_tests"] = asyncio.run(self.test_get_items_performance())
         self.results["calculate_recipe_tests"] = self.test_calculate_recipe_performance()
         self.results["consistency_tests"] = self.test_result_consistency()
+        self.executor.shutdown()
+        self.orig_client.close()
+        self.opt_client.close()
         
         # Generate summary
         self.generate_summary_report()
         
         # Save results to file
-        with open("rf_performance_testing/rf_new_database_comparison_results.json", "w") as f:
-            json.dump(self.results, f, indent=2)
+        self.out.close()
+        with open("rf_performance_testing/rf_new_database_comparison_results.json", "wb") as f:
+            f.write(orjson.dumps(self.results, option=orjson.OPT_INDENT_2))
         
-        print(f"\nFull results saved to: rf_performance_testing/rf_new_database_comparison_results.json")
+        print(f"\nPer-request measurements streamed to: rf_performance_testing/rf_new_database_comparison_results.ndjson")
+        print(f"Full results saved to: rf_performance_testing/rf_new_database_comparison_results.json")
 
     def generate_summary_report(self) -> None:
         """Generate and print summary report"""
@@ -348,24 +425,30 @@ class NewDatabaseComparisonTest:
         
         # GET /items/ summary
         print("\n📊 GET /items/ Performance:")
-        for scenario, data in self.results["get_items_tests"].items():
-            if "avg_time" in data.get("original", {}) and "avg_time" in data.get("optimized", {}):
-                orig_time = data["original"]["avg_time"]
-                opt_time = data["optimized"]["avg_time"]
-                improvement = data.get("improvement_ratio", 0)
-                print(f"  {scenario:20s}: {orig_time:.3f}s → {opt_time:.3f}s ({improvement:.1f}x improvement)")
+        tests = self.results["get_items_tests"]
+        names, orig, opt, ratio = improvement_table(tests)
+        for scenario, orig_time, opt_time, improvement in zip(names, orig, opt, ratio):
+            data = tests[scenario]
+            print(f"  {scenario:20s}: {orig_time:.3f}s → {opt_time:.3f}s median ({improvement:.1f}x improvement)")
+            print(f"  {'':20s}  Best: {data['original']['min_time']:.3f}s → {data['optimized']['min_time']:.3f}s")
+        if ratio.size:
+            print(f"  {'Geometric mean':20s}: {geometric_mean(ratio):.1f}x improvement")
             
         # POST /calculate-recipe/ summary  
         print("\n⚡ POST /calculate-recipe/ Performance:")
-        for recipe, data in self.results["calculate_recipe_tests"].items():
-            if "avg_time" in data.get("original", {}) and "avg_time" in data.get("optimized", {}):
-                orig_time = data["original"]["avg_time"]
-                opt_time = data["optimized"]["avg_time"]
-                improvement = data.get("improvement_ratio", 0)
-                orig_success = data["original"]["success_count"]
-                opt_success = data["optimized"]["success_count"]
-                print(f"  {recipe:20s}: {orig_time:.3f}s → {opt_time:.3f}s ({improvement:.1f}x improvement)")
-                print(f"  {'':20s}  Success: {orig_success}/5 → {opt_success}/5")
+        tests = self.results["calculate_recipe_tests"]
+        names, orig, opt, ratio = improvement_table(tests)
+        for recipe, orig_time, opt_time, improvement in zip(names, orig, opt, ratio):
+            data = tests[recipe]
+            orig_success = data["original"]["success_count"]
+            opt_success = data["optimized"]["success_count"]
+            runs = len(data["original"]["times"])
+            print(f"  {recipe:20s}: {orig_time:.3f}s → {opt_time:.3f}s median ({improvement:.1f}x improvement)")
+            print(f"  {'':20s}  Best: {data['original']['min_time']:.3f}s → {data['optimized']['min_time']:.3f}s, "
+                  f"p95: {data['original']['p95_time']:.3f}s → {data['optimized']['p95_time']:.3f}s")
+            print(f"  {'':20s}  Success: {orig_success}/{runs} → {opt_success}/{runs}")
+        if ratio.size:
+            print(f"  {'Geometric mean':20s}: {geometric_mean(ratio):.1f}x improvement")
                 
         # Consistency summary
         print("\n🎯 Result Consistency:")
@@ -5,11 +5,12 @@ Test mathematical consistency between original and optimized endpoints.
 Tests /calculate-recipe/ vs /calculate-recipe-optimized/ for identical results.
 """
 
-import json
-import requests
-import time
+import orjson
+import sys
 
-def test_optimized_consistency():
+from _harness import POOL, extract_score, timed_post
+
+def test_optimized_consistency(full: bool = False):
     """Test optimized endpoint against original for mathematical consistency."""
     
     print("FIT API Optimized Endpoint Consistency Testing")
@@ -49,29 +50,32 @@ def test_optimized_consistency():
         }
     ]
     
+    # Submit every test case against both endpoints up front, then report in order;
+    # each payload is encoded once and the same bytes go to both endpoints
+    futures = []
     for test_case in test_cases:
+        encoded = orjson.dumps(test_case["data"])
+        futures.append((
+            POOL.submit(timed_post, f"{base_url}/calculate-recipe/", encoded),
+            POOL.submit(timed_post, f"{base_url}/calculate-recipe-optimized/", encoded),
+        ))
+    
+    for test_case, (orig_future, opt_future) in zip(test_cases, futures):
         print(f"\n{'='*60}")
         print(f"VERIFYING: {test_case['name']}")
         print(f"{'='*60}")
         
         # Test original endpoint
         print("[ORIGINAL] /calculate-recipe/")
-        start_time = time.time()
         try:
-            response_orig = requests.post(
-                f"{base_url}/calculate-recipe/",
-                json=test_case["data"],
-                timeout=30
-            )
-            orig_time = time.time() - start_time
+            response_orig, orig_time = orig_future.result()
             
             if response_orig.status_code == 200:
-                orig_data = response_orig.json()
-                orig_score = orig_data["recipe_scores"]["single_score"]
+                orig_score, orig_items = extract_score(response_orig.content, len(test_case["data"]["items"]), full)
                 print(f"✅ SUCCESS")
                 print(f"   Response time: {orig_time:.3f} seconds")
                 print(f"   Recipe single score: {orig_score}")
-                print(f"   Items in response: {len(orig_data['graded_lcia_results'])}")
+                print(f"   Items in response: {orig_items}")
             else:
                 print(f"❌ FAILED - Status: {response_orig.status_code}")
                 continue
@@ -82,22 +86,15 @@ def test_optimized_consistency():
             
         # Test optimized endpoint
         print(f"\n[OPTIMIZED] /calculate-recipe-optimized/")
-        start_time = time.time()
         try:
-            response_opt = requests.post(
-                f"{base_url}/calculate-recipe-optimized/",
-                json=test_case["data"],
-                timeout=30
-            )
-            opt_time = time.time() - start_time
+            response_opt, opt_time = opt_future.result()
             
             if response_opt.status_code == 200:
-                opt_data = response_opt.json()
-                opt_score = opt_data["recipe_scores"]["single_score"]
+                opt_score, opt_items = extract_score(response_opt.content, len(test_case["data"]["items"]), full)
                 print(f"✅ SUCCESS")
                 print(f"   Response time: {opt_time:.3f} seconds")
                 print(f"   Recipe single score: {opt_score}")
-                print(f"   Items in response: {len(opt_data['graded_lcia_results'])}")
+                print(f"   Items in response: {opt_items}")
             else:
                 print(f"❌ FAILED - Status: {response_opt.status_code}")
                 continue
@@ -131,4 +128,5 @@ def test_optimized_consistency():
     print("=" * 60)
 
 if __name__ == "__main__":
-    test_optimized_consistency()
\ No newline at end of file
+    # --full parses every response completely instead of scanning for the score
+    test_optimized_consistency(full="--full" in sys.argv)
\ No newline at end of file
@@ -9,12 +9,12 @@ Compares performance and mathematical consistency between:
 Both endpoints should return identical results with improved performance.
 """
 
-import json
-import time
-import requests
-from typing import Dict, Any
+import orjson
+import sys
 
-def test_endpoint_comparison():
+from _harness import POOL, extract_score, timed_post
+
+def test_endpoint_comparison(full: bool = False):
     """Test both endpoints with the same data and compare results."""
     
     print("FIT API Optimized Endpoint Testing")
@@ -49,29 +49,31 @@ def test_endpoint_comparison():
     
     base_url_8081 = "http://localhost:8081"
     
-    for test_name, test_data in test_cases:
+    # Submit every test case against both endpoints up front, then report in order;
+    # each payload is encoded once and the same bytes go to both endpoints
+    futures = []
+    for _, test_data in test_cases:
+        encoded = orjson.dumps(test_data)
+        futures.append((
+            POOL.submit(timed_post, f"{base_url_8081}/calculate-recipe/", encoded),
+            POOL.submit(timed_post, f"{base_url_8081}/calculate-recipe-optimized/", encoded),
+        ))
+    
+    for (test_name, test_data), (original_future, optimized_future) in zip(test_cases, futures):
         print(f"\n{test_name}")
         print("-" * 50)
         
         # Test original endpoint
         print(f"[ORIGINAL] /calculate-recipe/")
-        start_time = time.time()
         try:
-            response_original = requests.post(
-                f"{base_url_8081}/calculate-recipe/",
-                json=test_data,
-                headers={"Content-Type": "application/json"},
-                timeout=30
-            )
-            original_time = time.time() - start_time
+            response_original, original_time = original_future.result()
             
             if response_original.status_code == 200:
-                original_data = response_original.json()
-                original_score = original_data["recipe_scores"]["single_score"]
+                original_score, original_items = extract_score(response_original.content, len(test_data["items"]), full)
                 print(f"✅ SUCCESS")
                 print(f"   Response time: {original_time:.3f} seconds")
                 print(f"   Recipe single score: {original_score}")
-                print(f"   Items in response: {len(original_data['graded_lcia_results'])}")
+                print(f"   Items in response: {original_items}")
             else:
                 print(f"❌ FAILED - Status: {response_original.status_code}")
                 print(f"   Error: {response_original.text}")
@@ -83,23 +85,15 @@ def test_endpoint_comparison():
             
         # Test optimized endpoint
         print(f"\n[OPTIMIZED] /calculate-recipe-optimized/")
-        start_time = time.time()
         try:
-            response_optimized = requests.post(
-                f"{base_url_8081}/calculate-recipe-optimized/",
-                json=test_data,
-                headers={"Content-Type": "application/json"},
-                timeout=30
-            )
-            optimized_time = time.time() - start_time
+            response_optimized, optimized_time = optimized_future.result()
             
             if response_optimized.status_code == 200:
-                optimized_data = response_optimized.json()
-                optimized_score = optimized_data["recipe_scores"]["single_score"]
+                optimized_score, optimized_items = extract_score(response_optimized.content, len(test_data["items"]), full)
                 print(f"✅ SUCCESS")
                 print(f"   Response time: {optimized_time:.3f} seconds")
                 print(f"   Recipe single score: {optimized_score}")
-                print(f"   Items in response: {len(optimized_data['graded_lcia_results'])}")
+                print(f"   Items in response: {optimized_items}")
             else:
                 print(f"❌ FAILED - Status: {response_optimized.status_code}")
                 print(f"   Error: {response_optimized.text}")
@@ -136,4 +130,5 @@ def test_endpoint_comparison():
     print("=" * 60)
 
 if __name__ == "__main__":
-    test_endpoint_comparison()
\ No newline at end of file
+    # --full parses every response completely instead of scanning for the score
+    test_endpoint_comparison(full="--full" in sys.argv)
\ No newline at end of file
@@ -4,78 +4,157 @@ Verification script to ensure mathematical optimizations don't change calculatio
 Compares detailed responses between original and optimized endpoints
 """
 
-import json
+import asyncio
+import orjson
 import urllib.request
 import urllib.error
 from datetime import datetime
 import sys
 
+import numpy as np
+
+try:
+    import httpx
+    # Pooled keep-alive client reused for every request
+    CLIENT = httpx.Client(timeout=30.0, limits=httpx.Limits(max_keepalive_connections=8))
+except ImportError:
+    # httpx is not installed, fall back to one urllib connection per request
+    CLIENT = None
+
+ORIGINAL_URL = "http://localhost:8080/calculate-recipe/"
+OPTIMIZED_URL = "http://localhost:8081/calculate-recipe/"
+
 def fetch_calculation_result(url, payload):
     """Fetch calculation result from endpoint"""
     try:
-        data = json.dumps(payload).encode('utf-8')
-        req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+        data = orjson.dumps(payload)
         
-        with urllib.request.urlopen(req) as response:
-            response_data = response.read().decode('utf-8')
+        if CLIENT is not None:
+            response = CLIENT.post(url, content=data, headers={'Content-Type': 'application/json'})
+            response.raise_for_status()
+            response_data = response.content
+        else:
+            req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+            with urllib.request.urlopen(req) as response:
+                response_data = response.read()
             
-        return json.loads(response_data)
+        return orjson.loads(response_data)
+    except Exception as e:
+        return {'error': str(e)}
+
+async def fetch_calculation_result_async(client, url, payload):
+    """Fetch calculation result from endpoint on a shared async client"""
+    try:
+        response = await client.post(url, content=orjson.dumps(payload), headers={'Content-Type': 'application/json'})
+        response.raise_for_status()
+        return orjson.loads(response.content)
     except Exception as e:
         return {'error': str(e)}
 
-def compare_float_values(val1, val2, tolerance=1e-10):
-    """Compare floating point values with tolerance"""
-    if isinstance(val1, (int, float)) and isinstance(val2, (int, float)):
-        return abs(val1 - val2) < tolerance
-    return val1 == val2
+async def fetch_all_results(payloads):
+    """Fetch the original and optimized results of every payload concurrently"""
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        results = await asyncio.gather(*(
+            fetch_calculation_result_async(client, url, payload)
+            for payload in payloads for url in (ORIGINAL_URL, OPTIMIZED_URL)
+        ))
+    return list(zip(results[::2], results[1::2]))
 
-def deep_compare_results(result1, result2, path=""):
-    """Recursively compare two result dictionaries"""
-    differences = []
+FLOAT_TOLERANCE = 1e-10
+NUMERIC_TYPES = (int, float, bool)
+# Containers with at least this many float values are compared in one NumPy operation
+VECTORIZE_MIN_SIZE = 8
+# Marks a key absent from the optimized result without a second dict lookup
+_MISSING = object()
+
+def format_path(path):
+    """Render a path tuple as 'key.key[index]', only needed once a difference is found"""
+    parts = []
+    for part in path:
+        if type(part) is int:
+            parts.append(f"[{part}]")
+        else:
+            parts.append(f".{part}" if parts else part)
+    return "".join(parts)
+
+def all_floats(values):
+    """Whether every value is exactly a float, so a whole container can be compared at once"""
+    return all(type(value) is float for value in values)
+
+def compare_float_values(keys, values1, values2, path, differences):
+    """Vectorized tolerance check of two equally long float sequences addressed by keys"""
+    array1 = np.fromiter(values1, np.float64, len(keys))
+    array2 = np.fromiter(values2, np.float64, len(keys))
+    for i in np.flatnonzero(~(np.abs(array1 - array2) < FLOAT_TOLERANCE)):
+        differences.append(f"{format_path(path + (keys[i],))}: Value mismatch - {array1[i]} vs {array2[i]}")
+
+def deep_compare_results(result1, result2, path=(), max_diffs=None):
+    """
+    Compare two result dictionaries with an explicit stack instead of recursion.
     
-    if type(result1) != type(result2):
-        differences.append(f"{path}: Type mismatch - {type(result1).__name__} vs {type(result2).__name__}")
-        return differences
+    path is the key/index tuple of result1 within its parent response and prefixes every
+    reported difference. Stops walking once max_diffs differences are found (None compares everything).
+    """
+    differences = []
+    stack = [(result1, result2, tuple(path))]
     
-    if isinstance(result1, dict):
-        # Compare all keys
-        all_keys = set(result1.keys()) | set(result2.keys())
-        for key in all_keys:
-            new_path = f"{path}.{key}" if path else key
+    while stack and (max_diffs is None or len(differences) < max_diffs):
+        val1, val2, path = stack.pop()
+        value_type = type(val1)
+        
+        if value_type is not type(val2):
+            differences.append(f"{format_path(path)}: Type mismatch - {value_type.__name__} vs {type(val2).__name__}")
+        
+        elif value_type is dict:
+            if (len(val1) >= VECTORIZE_MIN_SIZE and val1.keys() == val2.keys()
+                    and all_floats(val1.values()) and all_floats(val2.values())):
+                keys = list(val1)
+                compare_float_values(keys, val1.values(), map(val2.__getitem__, keys), path, differences)
+                continue
             
-            if key not in result1:
-                differences.append(f"{new_path}: Missing in original")
-            elif key not in result2:
-                differences.append(f"{new_path}: Missing in optimized")
+            # Compare all keys, pushing shared ones in reverse so they are visited in order
+            children = []
+            for key, child1 in val1.items():
+                child2 = val2.get(key, _MISSING)
+                if child2 is _MISSING:
+                    differences.append(f"{format_path(path + (key,))}: Missing in optimized")
+                else:
+                    children.append((child1, child2, path + (key,)))
+            if len(children) != len(val2):
+                for key in val2:
+                    if key not in val1:
+                        differences.append(f"{format_path(path + (key,))}: Missing in original")
+            stack.extend(reversed(children))
+        
+        elif value_type is list:
+            if len(val1) != len(val2):
+                differences.append(f"{format_path(path)}: Length mismatch - {len(val1)} vs {len(val2)}")
+            elif len(val1) >= VECTORIZE_MIN_SIZE and all_floats(val1) and all_floats(val2):
+                compare_float_values(range(len(val1)), val1, val2, path, differences)
             else:
-                differences.extend(deep_compare_results(result1[key], result2[key], new_path))
-    
-    elif isinstance(result1, list):
-        if len(result1) != len(result2):
-            differences.append(f"{path}: Length mismatch - {len(result1)} vs {len(result2)}")
-        else:
-            for i in range(len(result1)):
-                differences.extend(deep_compare_results(result1[i], result2[i], f"{path}[{i}]"))
-    
-    elif isinstance(result1, (int, float)) and isinstance(result2, (int, float)):
-        if not compare_float_values(result1, result2):
-            differences.append(f"{path}: Value mismatch - {result1} vs {result2}")
-    
-    elif result1 != result2:
-        differences.append(f"{path}: Value mismatch - {result1} vs {result2}")
+                stack.extend((val1[i], val2[i], path + (i,)) for i in reversed(range(len(val1))))
+        
+        elif value_type in NUMERIC_TYPES:
+            if not abs(val1 - val2) < FLOAT_TOLERANCE:
+                differences.append(f"{format_path(path)}: Value mismatch - {val1} vs {val2}")
+        
+        elif val1 != val2:
+            differences.append(f"{format_path(path)}: Value mismatch - {val1} vs {val2}")
     
-    return differences
+    return differences if max_diffs is None else differences[:max_diffs]
 
-def verify_recipe_consistency(recipe_payload, recipe_name):
+def verify_recipe_consistency(recipe_payload, recipe_name, max_diffs=50):
     """Verify that both endpoints return identical results for a recipe"""
+    original_result = fetch_calculation_result(ORIGINAL_URL, recipe_payload)
+    optimized_result = fetch_calculation_result(OPTIMIZED_URL, recipe_payload)
+    return report_recipe_consistency(recipe_name, original_result, optimized_result, max_diffs)
+
+def report_recipe_consistency(recipe_name, original_result, optimized_result, max_diffs=50):
+    """Compare already fetched results of both endpoints and print the verdict"""
     print(f"\n{'='*60}")
     print(f"VERIFYING: {recipe_name}")
     print(f"{'='*60}")
     
-    # Fetch results from both endpoints
-    original_result = fetch_calculation_result("http://localhost:8080/calculate-recipe/", recipe_payload)
-    optimized_result = fetch_calculation_result("http://localhost:8081/calculate-recipe/", recipe_payload)
-    
     # Check for errors
     if 'error' in original_result:
         print(f"❌ Original endpoint error: {original_result['error']}")
@@ -86,7 +165,7 @@ def verify_recipe_consistency(recipe_payload, recipe_name):
         return False
     
     # Compare results
-    differences = deep_compare_results(original_result, optimized_result)
+    differences = deep_compare_results(original_result, optimized_result, max_diffs=max_diffs)
     
     if not differences:
         print("✅ IDENTICAL RESULTS")
@@ -94,7 +173,8 @@ def verify_recipe_consistency(recipe_payload, recipe_name):
         print(f"   Items in response: {len(original_result.get('Item Results', {}))}")
         return True
     else:
-        print(f"❌ FOUND {len(differences)} DIFFERENCES:")
+        at_least = "AT LEAST " if max_diffs is not None and len(differences) >= max_diffs else ""
+        print(f"❌ FOUND {at_least}{len(differences)} DIFFERENCES:")
         for diff in differences[:10]:  # Show first 10 differences
             print(f"   • {diff}")
         if len(differences) > 10:
@@ -142,12 +222,21 @@ def main():
         },
     ]
     
-    # Run verification for each test case
+    # Fetch both ports of every test case at once, then verify each pair
+    payloads = [test_case["payload"] for test_case in test_cases]
+    if CLIENT is not None:
+        result_pairs = asyncio.run(fetch_all_results(payloads))
+    else:
+        result_pairs = [
+            (fetch_calculation_result(ORIGINAL_URL, payload), fetch_calculation_result(OPTIMIZED_URL, payload))
+            for payload in payloads
+        ]
+    
     all_passed = True
     passed_count = 0
     
-    for test_case in test_cases:
-        result = verify_recipe_consistency(test_case["payload"], test_case["name"])
+    for test_case, (original_result, optimized_result) in zip(test_cases, result_pairs):
+        result = report_recipe_consistency(test_case["name"], original_result, optimized_result)
         if result:
             passed_count += 1
         else:
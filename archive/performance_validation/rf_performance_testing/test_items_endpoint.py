@@ -5,12 +5,36 @@ Tests the FIT API running in Docker container at localhost:8080
 """
 
 import time
-import json
+import orjson
 import urllib.request
 import urllib.error
 from datetime import datetime
+from itertools import islice
 import sys
 
+try:
+    import httpx
+    # Pooled keep-alive client reused for every request; follows the slash redirect of e.g. /items like urllib does
+    CLIENT = httpx.Client(timeout=30.0, limits=httpx.Limits(max_keepalive_connections=8),
+                          follow_redirects=True)
+    CONNECTION_ERRORS = (urllib.error.URLError, httpx.TransportError)
+except ImportError:
+    # httpx is not installed, fall back to one urllib connection per request
+    CLIENT = None
+    CONNECTION_ERRORS = (urllib.error.URLError,)
+
+def report_http_error(status_code, body):
+    """Print and return the result of a non-2xx response, decoding the raw body only here"""
+    error = body.decode('utf-8', errors='replace')
+    print(f"❌ HTTP ERROR")
+    print(f"Status code: {status_code}")
+    print(f"Response: {error}")
+    return {
+        'success': False,
+        'status_code': status_code,
+        'error': error
+    }
+
 def test_items_endpoint(url="http://localhost:8080/items/"):
     """Test the GET /items/ endpoint and measure performance"""
     
@@ -20,53 +44,54 @@ def test_items_endpoint(url="http://localhost:8080/items/"):
     
     try:
         # Record start time
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         
         # Make the request
-        with urllib.request.urlopen(url) as response:
-            response_data = response.read().decode('utf-8')
+        if CLIENT is not None:
+            response = CLIENT.get(url)
+            if not response.is_success:
+                return report_http_error(response.status_code, response.content)
+            body = response.content
+        else:
+            with urllib.request.urlopen(url) as response:
+                body = response.read()
             
         # Record end time
-        end_time = time.time()
+        end_time = time.perf_counter_ns()
         
         # Calculate duration
-        duration = end_time - start_time
+        duration = (end_time - start_time) / 1e9
         
         # Parse response
-        data = json.loads(response_data)
+        # orjson parses the raw bytes directly, the body is never decoded to str
+        data = orjson.loads(body)
         item_count = len(data)
+        response_size = len(body)
         
         # Display results
         print(f"✅ SUCCESS")
         print(f"Response time: {duration:.3f} seconds")
         print(f"Number of items: {item_count}")
-        print(f"Response size: {len(response_data)} bytes")
+        print(f"Response size: {response_size} bytes")
         print(f"Items per second: {item_count/duration:.1f}")
         
         # Sample first few items
         print("\nFirst 3 items:")
-        for i, (key, value) in enumerate(list(data.items())[:3]):
+        for i, (key, value) in enumerate(islice(data.items(), 3)):
             print(f"  {i+1}. {key}: {value['product_name']} ({value['country']})")
         
         return {
             'success': True,
             'duration': duration,
             'item_count': item_count,
-            'response_size': len(response_data),
+            'response_size': response_size,
             'items_per_second': item_count/duration
         }
             
     except urllib.error.HTTPError as e:
-        print(f"❌ HTTP ERROR")
-        print(f"Status code: {e.code}")
-        print(f"Response: {e.read().decode('utf-8')}")
-        return {
-            'success': False,
-            'status_code': e.code,
-            'error': e.read().decode('utf-8')
-        }
+        return report_http_error(e.code, e.read())
         
-    except urllib.error.URLError as e:
+    except CONNECTION_ERRORS:
         print(f"❌ CONNECTION ERROR")
         print("Could not connect to http://localhost:8080")
         print("Make sure the Docker container is running with:")
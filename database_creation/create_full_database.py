@@ -1,4 +1,6 @@
 from sqlmodel import SQLModel, Field, create_engine, Session, select, func
+from sqlalchemy import event, literal, union_all, Float, Integer
+from sqlalchemy.schema import CreateTable
 from typing import Optional
 import os
 import pandas as pd
@@ -6,7 +8,9 @@ import json
 import glob
 import time
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import chain, islice
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -22,14 +26,43 @@ from sqlmodel_classes import (
 # Database setup with timestamp
 timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
 database_path = f"output/FIT_{timestamp}.db"
-logger.info(f"Creating database: {database_path}")
 
-if os.path.exists(database_path):
-    logger.info(f"Removing existing database: {database_path}")
-    os.remove(database_path)
+# Rows read from a CSV at a time, caps peak memory for the large result tables
+CSV_CHUNK_SIZE = 50_000
 
-engine = create_engine(f"sqlite:///{database_path}")
-SQLModel.metadata.create_all(engine)
+# Bound parameters per statement supported by every SQLite build (newer ones allow 32766)
+SQLITE_MAX_VARIABLES = 999
+
+# The database is rebuilt from CSV on every run, so journaling and fsyncs can optionally be skipped entirely
+UNSAFE_BULK_LOAD = os.environ.get("FIT_UNSAFE_BULK_LOAD") == "1"
+
+def make_engine(path, unsafe=UNSAFE_BULK_LOAD):
+    """Create an SQLite engine whose connections are tuned for bulk loading"""
+    engine = create_engine(f"sqlite:///{path}")
+    
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        # Let SQLAlchemy emit BEGIN itself (see do_begin) so SAVEPOINTs nest inside one real transaction
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        # page_size only applies while the file is still empty and must precede the switch to WAL
+        cursor.execute("PRAGMA page_size=8192")
+        if unsafe:
+            cursor.execute("PRAGMA journal_mode=OFF")
+            cursor.execute("PRAGMA synchronous=OFF")
+        else:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-65536")  # 64 MiB
+        cursor.execute("PRAGMA mmap_size=10737418240")
+        cursor.close()
+    
+    @event.listens_for(engine, "begin")
+    def do_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+    
+    return engine
 
 def load_csv_mapping():
     """Load the table-to-CSV mapping configuration"""
@@ -46,37 +79,54 @@ def find_csv_file(pattern):
         logger.warning(f"Multiple files found for {pattern}, using: {files[0]}")
     return files[0]
 
+# Column name mapping from CSV headers to database columns, per table
+COLUMN_MAPPINGS = {
+    'geographies': {
+        'alpha-2': 'geo_shorthand_2',
+        'alpha-3': 'geo_shorthand_3', 
+        'country-code': 'international_code',
+        'name': 'country_name'
+    },
+    'groups': {
+        'group_en': 'group_name'
+    },
+    'subgroups': {
+        'subgroup_en': 'subgroup_name'
+    },
+    'impactcategories': {
+        'normalisation_value': 'normalization_value',
+        'normalisation_unit': 'normalization_unit'
+    },
+    'lifecyclestages': {
+        'lcstage_shorthand': 'lc_stage_shorthand',
+        'name': 'lc_name'
+    },
+    'impactcategoryweights': {
+        'value': 'ic_weight'
+    },
+    'singlescores': {
+        'single_scores': 'single_score'
+    }
+}
+
 def get_column_mapping(table_name):
     """Get column name mapping from CSV headers to database columns"""
-    mappings = {
-        'geographies': {
-            'alpha-2': 'geo_shorthand_2',
-            'alpha-3': 'geo_shorthand_3', 
-            'country-code': 'international_code',
-            'name': 'country_name'
-        },
-        'groups': {
-            'group_en': 'group_name'
-        },
-        'subgroups': {
-            'subgroup_en': 'subgroup_name'
-        },
-        'impactcategories': {
-            'normalisation_value': 'normalization_value',
-            'normalisation_unit': 'normalization_unit'
-        },
-        'lifecyclestages': {
-            'lcstage_shorthand': 'lc_stage_shorthand',
-            'name': 'lc_name'
-        },
-        'impactcategoryweights': {
-            'value': 'ic_weight'
-        },
-        'singlescores': {
-            'single_scores': 'single_score'
-        }
-    }
-    return mappings.get(table_name, {})
+    return COLUMN_MAPPINGS.get(table_name, {})
+
+def get_csv_dtypes(table_class, table_name):
+    """Map CSV headers to pandas dtypes derived from the table schema, so read_csv skips type inference"""
+    csv_names = {db_name: csv_name for csv_name, db_name in get_column_mapping(table_name).items()}
+    dtypes = {}
+    for column in table_class.__table__.columns:
+        if isinstance(column.type, Integer):
+            # Missing values are NaN, which needs a float column; SQLite stores whole floats as integers
+            dtype = "float64" if column.nullable else "int64"
+        elif isinstance(column.type, Float):
+            dtype = "float64"
+        else:
+            dtype = str
+        dtypes[csv_names.get(column.name, column.name)] = dtype
+    return dtypes
 
 def clean_dataframe(df, table_name):
     """Clean DataFrame for database insertion"""
@@ -97,13 +147,51 @@ def clean_dataframe(df, table_name):
             df.loc[namibia_mask, 'geo_shorthand_2'] = 'NA'
             logger.info("Fixed missing alpha-2 code for Namibia: set to 'NA'")
     
-    # Replace NaN with None for proper NULL handling
-    df = df.where(pd.notnull(df), None)
+    # Insert each chunk in primary-key order, so the key B-tree is written in sorted runs of up to
+    # CSV_CHUNK_SIZE rows. A CSV larger than one chunk is not in global key order; sorting it during
+    # the merge would need ORDER BY, which defeats the page copy of the scratch tables
+    primary_key = [column.name for column in SQLModel.metadata.tables[table_name].primary_key.columns]
+    df = df.sort_values(primary_key, kind='mergesort')
     
     logger.info(f"Cleaned {table_name}: {len(df)} records, {len(df.columns)} columns")
     logger.info(f"Columns: {list(df.columns)}")
     return df
 
+def insert_rows(session, table, df):
+    """
+    Insert all DataFrame rows with multi-row INSERT statements inside the session's transaction.
+    
+    Only the table's own columns are inserted, CSV columns without a table column are ignored.
+    Missing values can stay NaN: SQLite stores a bound NaN as NULL.
+    """
+    table_columns = [column.name for column in table.columns if column.name in df.columns]
+    if table_columns != list(df.columns):
+        df = df[table_columns]
+    columns = ", ".join(f'"{column}"' for column in table_columns)
+    row_placeholders = "(" + ", ".join("?" * len(table_columns)) + ")"
+    # Like SQLAlchemy's insertmanyvalues, pack as many rows per statement as the bound parameter limit allows
+    rows_per_statement = max(1, SQLITE_MAX_VARIABLES // len(table_columns))
+    
+    def statement(row_count):
+        return f'INSERT INTO "{table.name}" ({columns}) VALUES {", ".join([row_placeholders] * row_count)}'
+    
+    # The raw connection shares the session's open transaction and savepoint, but skips
+    # SQLAlchemy's per-row parameter processing; rows are fed lazily as flat tuples
+    rows = df.itertuples(index=False, name=None)
+    full_statements, remainder = divmod(len(df), rows_per_statement)
+    dbapi_connection = session.connection().connection.dbapi_connection
+    cursor = dbapi_connection.cursor()
+    try:
+        if full_statements:
+            cursor.executemany(statement(rows_per_statement), (
+                tuple(chain.from_iterable(islice(rows, rows_per_statement))) for _ in range(full_statements)
+            ))
+        if remainder:
+            cursor.execute(statement(remainder), tuple(chain.from_iterable(rows)))
+    finally:
+        cursor.close()
+    return len(df)
+
 def populate_table(table_class, csv_pattern, session):
     """Populate a single table from CSV with batch operations"""
     table_name = table_class.__tablename__
@@ -115,60 +203,98 @@ def populate_table(table_class, csv_pattern, session):
         logger.info(f"Loading CSV: {csv_file}")
         
         # Read CSV with semicolon delimiter and skip first column (index)
-        # Preventing `item_id` being incorrectly set as numeral
-        df = pd.read_csv(csv_file, sep=';', index_col=0, encoding="utf-8", dtype={"item_id": str})
-        df = clean_dataframe(df, table_name)
-        
-        if len(df) == 0:
-            logger.warning(f"No data found in {csv_file}")
-            return 0
-        
-        # Convert DataFrame to records for bulk insert
-        records = df.to_dict('records')
+        # Column dtypes come from the schema, preventing e.g. `item_id` being incorrectly set as numeral
+        # Streamed in chunks so only one chunk is held in memory at a time
+        chunks = pd.read_csv(csv_file, sep=';', index_col=0, encoding="utf-8", engine="c",
+                             dtype=get_csv_dtypes(table_class, table_name), chunksize=CSV_CHUNK_SIZE)
         
         # Tables that might have duplicates - use merge instead of bulk insert
         tables_with_duplicates = set()  # metadata now has composite primary key
+        total_inserted = 0
         
-        if table_name in tables_with_duplicates:
-            # Use merge for tables with potential duplicates
-            total_inserted = 0
-            for record in records:
-                obj = table_class(**record)
-                session.merge(obj)
-                total_inserted += 1
+        # Savepoint per table: a failing CSV rolls back only its own rows, not the tables loaded before it
+        with session.begin_nested():
+            for chunk in chunks:
+                df = clean_dataframe(chunk, table_name)
                 
-                if total_inserted % 1000 == 0:
-                    session.commit()
-                    logger.info(f"  Processed {total_inserted}/{len(records)} records")
-            
-            session.commit()
-        else:
-            # Use bulk insert for tables without duplicates
-            batch_size = 10000
-            total_inserted = 0
-            
-            for i in range(0, len(records), batch_size):
-                batch = records[i:i+batch_size]
-                session.bulk_insert_mappings(table_class, batch)
-                session.commit()
-                total_inserted += len(batch)
-                
-                if len(records) > batch_size:
-                    logger.info(f"  Inserted batch {i//batch_size + 1}/{(len(records)-1)//batch_size + 1}")
+                if table_name in tables_with_duplicates:
+                    # Use merge for tables with potential duplicates. The ORM needs None instead of NaN,
+                    # which only nullable columns can hold, so only those are converted
+                    nullable_columns = [column.name for column in table_class.__table__.columns
+                                        if column.nullable and column.name in df.columns]
+                    df[nullable_columns] = df[nullable_columns].astype(object).where(df[nullable_columns].notna(), None)
+                    for record in df.to_dict('records'):
+                        obj = table_class(**record)
+                        session.merge(obj)
+                        total_inserted += 1
+                    
+                        if total_inserted % 1000 == 0:
+                            session.flush()
+                            logger.info(f"  Processed {total_inserted} records")
+                else:
+                    # Bulk insert tables without duplicates straight through sqlite3
+                    total_inserted += insert_rows(session, table_class.__table__, df)
+        
+        if total_inserted == 0:
+            logger.warning(f"No data found in {csv_file}")
+            return 0
         
         logger.info(f"{table_name}: {total_inserted} records inserted")
         return total_inserted
         
     except Exception as e:
         logger.error(f"Error populating {table_name}: {e}")
-        session.rollback()
         return 0
 
+def load_table_to_scratch(table_class, csv_pattern, scratch_path):
+    """Load one table into its own scratch database; runs in a worker process"""
+    if os.path.exists(scratch_path):
+        os.remove(scratch_path)
+    
+    # The scratch file is thrown away after the merge, so it needs no journal. A table that fails
+    # to load reports 0 records and is never merged, so no rollback is ever relied upon
+    engine = make_engine(scratch_path, unsafe=True)
+    # Bare CREATE TABLE: secondary indexes are only built on the final database
+    with engine.begin() as connection:
+        connection.execute(CreateTable(table_class.__table__))
+    with Session(engine) as session, session.begin():
+        records_inserted = populate_table(table_class, csv_pattern, session)
+    engine.dispose()
+    return records_inserted
+
+def merge_scratch_database(connection, table_class, scratch_path):
+    """Copy one table from its scratch database into the final database"""
+    table_name = table_class.__tablename__
+    cursor = connection.cursor()
+    # SQLite cannot DETACH inside a transaction, so every table is merged in its own
+    cursor.execute("ATTACH DATABASE ? AS scratch", (scratch_path,))
+    try:
+        cursor.execute("BEGIN")
+        try:
+            # Both tables come from the same CreateTable, so a bare SELECT * lets SQLite copy the
+            # B-tree pages directly (its transfer optimization); a column list would insert row by row
+            cursor.execute(f'INSERT INTO main."{table_name}" SELECT * FROM scratch."{table_name}"')
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+    finally:
+        cursor.execute("DETACH DATABASE scratch")
+        cursor.close()
+
 def create_full_database():
     """Create the complete FIT database from CSV files"""
     logger.info("Starting full database creation...")
     start_time = time.time()
     
+    logger.info(f"Creating database: {database_path}")
+    if os.path.exists(database_path):
+        logger.info(f"Removing existing database: {database_path}")
+        os.remove(database_path)
+    
+    engine = make_engine(database_path)
+    SQLModel.metadata.create_all(engine)
+    
     # Load CSV mapping
     csv_mapping = load_csv_mapping()
     
@@ -189,24 +315,62 @@ def create_full_database():
     
     total_records = 0
     
-    with Session(engine) as session:
-        for table_class, table_key in table_order:
-            csv_pattern = csv_mapping[table_key]
-            records_inserted = populate_table(table_class, csv_pattern, session)
+    # Secondary indexes are built once after the load instead of being updated on every insert
+    indexes = [index for table_class, _ in table_order for index in table_class.__table__.indexes]
+    for index in indexes:
+        index.drop(engine)
+    
+    # The tables have no foreign keys between them, so every CSV is parsed and loaded in
+    # parallel, each by its own worker process into its own scratch database
+    scratch_paths = {
+        table_class: f"output/tmp_{timestamp}_{table_class.__tablename__}.db" for table_class, _ in table_order
+    }
+    with ProcessPoolExecutor(max_workers=min(len(table_order), os.cpu_count() or 1)) as executor:
+        futures = [
+            (table_class, executor.submit(
+                load_table_to_scratch, table_class, csv_mapping[table_key], scratch_paths[table_class]
+            ))
+            for table_class, table_key in table_order
+        ]
+        loaded = [(table_class, future.result()) for table_class, future in futures]
+    
+    # Merge the scratch tables into the final database; SELECT * lets SQLite copy them page by page
+    connection = engine.raw_connection()
+    try:
+        for table_class, records_inserted in loaded:
+            if records_inserted:
+                merge_scratch_database(connection, table_class, scratch_paths[table_class])
             total_records += records_inserted
+            os.remove(scratch_paths[table_class])
+    finally:
+        connection.close()
+    
+    for index in indexes:
+        logger.info(f"Creating index {index.name}")
+        index.create(engine)
     
     end_time = time.time()
     logger.info(f"Database creation completed in {end_time - start_time:.2f} seconds")
     logger.info(f"Total records inserted: {total_records:,}")
     
-    # Verify final database
+    # Verify final database, counting every table in a single round trip
     with Session(engine) as session:
         logger.info("\nFinal database summary:")
-        for table_class, _ in table_order:
-            # count = session.query(table_class).count()
-            statement = select(func.count()).select_from(table_class)
-            count = session.exec(statement).one()
-            logger.info(f"  {table_class.__tablename__}: {count:,} records")
+        statement = union_all(*(
+            select(literal(table_class.__tablename__), func.count()).select_from(table_class)
+            for table_class, _ in table_order
+        ))
+        for table_name, count in session.execute(statement):
+            logger.info(f"  {table_name}: {count:,} records")
+    
+    # Hand over a self-contained file: the API may open it read-only, where WAL would need its -shm file
+    # (on a raw autocommit connection, the journal mode cannot change inside a transaction)
+    connection = engine.raw_connection()
+    try:
+        connection.cursor().execute("PRAGMA journal_mode=DELETE")
+    finally:
+        connection.close()
+    engine.dispose()
 
 if __name__ == "__main__":
     try:
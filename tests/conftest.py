@@ -1,5 +1,9 @@
+from itertools import product
+
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
 from sqlmodel import (
     create_engine,
     Session,
@@ -7,10 +11,22 @@ from sqlmodel import (
 )
 
 import API.models as models
-from API import dependencies, database
+from API import database
 from API.main import app
 
 
+def bulk_insert(session, model, rows):
+    """
+    Insert plain row dicts into a model's table with one Core executemany.
+
+    Args:
+        session (Session): The database session.
+        model (SQLModel): The table model to insert into.
+        rows (list): A list of dicts keyed by column name.
+    """
+    session.connection().execute(model.__table__.insert(), rows)
+
+
 def create_geographies(geo_ids):
     """
     Create geography data for a list of geo IDs.
@@ -34,116 +50,99 @@ def create_geographies(geo_ids):
     return geographies
 
 
-def populate_geographies(session, geographies):
+def geography_rows(geographies):
     """
-    Populate the database with geography data.
+    Build the geographies table rows.
 
     Args:
-        session (Session): The database session.
         geographies (dict): A dictionary of geography data with geo_id as keys.
+
+    Returns:
+        list: A list of row dicts keyed by column name.
     """
-    geo_models = [models.Geographies(**geo_info) for geo_info in geographies.values()]
-    session.add_all(geo_models)
-    session.commit()
-
-
-def populate_groups(
-        session, group_ids
-):
-    groups = []
-    for group_id in group_ids:
-        groups.append(
-            models.Groups(
-                group_id=group_id, group_name=f"Group {group_id}"
-            )
-        )
-    session.add_all(
-        groups
-    )
+    return list(geographies.values())
 
 
-def populate_subgroups(
-        session, subgroup_ids
-):
-    subgroups = []
-    for subgroup_id in subgroup_ids:
-        subgroups.append(
-            models.Subgroups(
-                subgroup_id=subgroup_id, subgroup_name=f"Subgroup {subgroup_id}"
-            )
-        )
-    session.add_all(
-        subgroups
-    )
+def group_rows(group_ids):
+    groups = [
+        {"group_id": group_id, "group_name": f"Group {group_id}"}
+        for group_id in group_ids
+    ]
+    return groups
+
+
+def subgroup_rows(subgroup_ids):
+    subgroups = [
+        {"subgroup_id": subgroup_id, "subgroup_name": f"Subgroup {subgroup_id}"}
+        for subgroup_id in subgroup_ids
+    ]
+    return subgroups
 
 
-def populate_metadata(session, item_ids, geo_ids, proxy_flags=None):
+def metadata_rows(item_ids, geo_ids, proxy_flags=None):
     """
-    Populate the database with metadata.
+    Build the metadata table rows.
 
     Args:
-        session (Session): The database session.
         item_ids (list): A list of item IDs.
         geo_ids (list): A list of geographic IDs corresponding to the items.
         proxy_flags (list): A list of boolean flags indicating whether each item is a proxy.
+
+    Returns:
+        list: A list of row dicts keyed by column name.
     """
     if proxy_flags is None:
         proxy_flags = [False] * len(item_ids)  # Default to all items having `proxy_flag` set to False
 
-    metadata = []
-    for item_id, geo_id, proxy_flag in zip(item_ids, geo_ids, proxy_flags):
-        metadata.append(
-            models.MetaData(
-                item_id=item_id,
-                geo_id=geo_id,
-                name_lci=f"Item {item_id}",
-                proxy_flag=proxy_flag
-            )
-        )
-    session.add_all(metadata)
+    metadata = [
+        {
+            "item_id": item_id,
+            "geo_id": geo_id,
+            "name_lci": f"Item {item_id}",
+            "proxy_flag": proxy_flag
+        }
+        for item_id, geo_id, proxy_flag in zip(item_ids, geo_ids, proxy_flags)
+    ]
+    return metadata
 
 
 
-def populate_life_cycle_stages(
-        session, stage_ids
-):
-    stages = [models.LifeCycleStages(
-        lc_stage_id=stage_id, lc_stage_shorthand=f"Stage{stage_id}", lc_name=f"Phase {stage_id}"
-    ) for stage_id in stage_ids]
-    session.add_all(
-        stages
-    )
+def life_cycle_stage_rows(stage_ids):
+    stages = [{
+        "lc_stage_id": stage_id, "lc_stage_shorthand": f"Stage{stage_id}", "lc_name": f"Phase {stage_id}"
+    } for stage_id in stage_ids]
+    return stages
 
 
-def populate_impact_categories(session, category_ids):
+def impact_category_rows(category_ids):
     impact_categories = [
-        models.ImpactCategories(
-            ic_id=ic_id,
-            ic_name=f"Category {ic_id}",
-            ic_shorthand=f"C{ic_id}",
-            normalization_value=1.0,  # Set default or appropriate value
-            normalization_unit="kg CO2e"  # Set default or appropriate unit
-        )
+        {
+            "ic_id": ic_id,
+            "ic_name": f"Category {ic_id}",
+            "ic_shorthand": f"C{ic_id}",
+            "normalization_value": 1.0,  # Set default or appropriate value
+            "normalization_unit": "kg CO2e"  # Set default or appropriate unit
+        }
         for ic_id in category_ids
     ]
-    session.add_all(impact_categories)
-    session.commit()
+    return impact_categories
 
 
-def populate_weighting_schemes(session, weighting_names):
+def weighting_scheme_rows(weighting_names):
     """
-    Populate the database with weighting schemes.
+    Build the weighting schemes table rows.
 
     Args:
-        session (Session): The database session.
         weighting_names (list): A list of valid weighting scheme names.
+
+    Returns:
+        list: A list of row dicts keyed by column name.
     """
     schemes = [
-        models.WeightingSchemes(scheme_id=id, name=weighting_name)
+        {"scheme_id": id, "name": weighting_name}
         for id, weighting_name in enumerate(weighting_names, start=1)
     ]
-    session.add_all(schemes)
-    session.commit()
+    return schemes
 
 
 def create_single_scores(item_ids, geo_ids, scheme_ids, proxy_flags):
@@ -161,60 +160,62 @@ def create_single_scores(item_ids, geo_ids, scheme_ids, proxy_flags):
                and the min and max single scores for non-proxy items.
     """
     single_scores = {}
-    non_proxy_scores = []
+    # Running min/max of the non-proxy scores, None until the first one is seen
+    non_proxy_min = non_proxy_max = None
 
     for item_id, geo_id, is_proxy in zip(item_ids, geo_ids, proxy_flags):
-        for scheme_id in scheme_ids:
-            if is_proxy:
-                # Inflate proxy values
-                single_score = 100000.0 + geo_id + scheme_id  # Significantly higher than non-proxy
-            else:
-                single_score = 50.0 + geo_id + scheme_id  # Example score calculation
-                non_proxy_scores.append(single_score)
+        # Branch on the proxy flag once per item rather than once per score
+        if is_proxy:
+            # Inflate proxy values
+            base_score = 100000.0 + geo_id  # Significantly higher than non-proxy
+        else:
+            base_score = 50.0 + geo_id  # Example score calculation
+        item_scores = [base_score + scheme_id for scheme_id in scheme_ids]
+        single_scores.update(
+            ((item_id, geo_id, scheme_id), single_score)
+            for scheme_id, single_score in zip(scheme_ids, item_scores)
+        )
 
-            single_scores[(item_id, geo_id, scheme_id)] = single_score
+        if not is_proxy and item_scores:
+            item_min, item_max = min(item_scores), max(item_scores)
+            if non_proxy_min is None:
+                non_proxy_min, non_proxy_max = item_min, item_max
+            else:
+                non_proxy_min, non_proxy_max = min(non_proxy_min, item_min), max(non_proxy_max, item_max)
 
-    if not non_proxy_scores:
+    if non_proxy_min is None:
         raise ValueError("No non-proxy items available for single score calculations.")
 
-    return single_scores, min(non_proxy_scores), max(non_proxy_scores)
+    return single_scores, non_proxy_min, non_proxy_max
 
-def populate_single_scores(
-        session, single_scores
-):
-    single_scores = [models.SingleScores(
-        item_id=key[0], geo_id=key[1], scheme_id=key[2], single_score=value
-    ) for key, value in single_scores.items()]
-    session.add_all(
-        single_scores
-    )
+def single_score_rows(single_scores):
+    single_scores = [{
+        "item_id": key[0], "geo_id": key[1], "scheme_id": key[2], "single_score": value
+    } for key, value in single_scores.items()]
+    return single_scores
 
 
 def create_impact_category_weights(scheme_ids, impact_categories):
-    ic_weights = {}
-    for scheme_id in scheme_ids:
-        num_categories = len(impact_categories)
-        # Assign each category an initial weight
-        weights = [round(1.0 / num_categories, 2) for _ in range(num_categories)]
-        # Adjust the last weight to make sure the sum is exactly 1.0
-        weights[-1] = round(1.0 - sum(weights[:-1]), 2)
-
-        # Store weights in the dictionary
-        for ic_id, weight in zip(impact_categories, weights):
-            ic_weights[(scheme_id, ic_id)] = weight
+    # The weights are the same for every scheme, so they are computed once
+    num_categories = len(impact_categories)
+    # Assign each category an initial weight
+    weights = [round(1.0 / num_categories, 2)] * num_categories
+    # Adjust the last weight to make sure the sum is exactly 1.0
+    weights[-1] = round(1.0 - sum(weights[:-1]), 2)
+
+    ic_weights = {
+        (scheme_id, ic_id): weight
+        for scheme_id, (ic_id, weight) in product(scheme_ids, zip(impact_categories, weights))
+    }
 
     return ic_weights
 
 
-def populate_impact_category_weights(
-        session, ic_weights
-):
-    weights = [models.ImpactCategoryWeights(
-        scheme_id=key[0], ic_id=key[1], ic_weight=value
-    ) for key, value in ic_weights.items()]
-    session.add_all(
-        weights
-    )
+def impact_category_weight_rows(ic_weights):
+    weights = [{
+        "scheme_id": key[0], "ic_id": key[1], "ic_weight": value
+    } for key, value in ic_weights.items()]
+    return weights
 
 
 def create_weighted_results(item_ids, geo_ids, scheme_ids, impact_categories, stages, proxy_flags):
@@ -233,73 +234,69 @@ def create_weighted_results(item_ids, geo_ids, scheme_ids, impact_categories, st
         tuple: A dictionary of weighted results keyed by (item_id, geo_id, ic_id, stage_id, scheme_id),
                and dictionaries for min and max values for each impact category and stage for non-proxy items.
     """
-    weighted_results = {}
-    ic_values = {ic_id: [] for ic_id in impact_categories}
-    lc_values = {stage_id: [] for stage_id in stages}
+    # The value only depends on (scheme, category, stage), so it is computed once and reused for every item
+    base_values = {
+        (scheme_id, ic_id, stage_id): ic_id * stage_id * (scheme_id % 2 + 1)
+        for scheme_id, ic_id, stage_id in product(scheme_ids, impact_categories, stages)
+    }
+    # Proxy values are inflated far above the rest
+    weighted_results = {
+        (item_id, geo_id, ic_id, stage_id, scheme_id): 100000.0 + base_value if is_proxy else 10 * base_value
+        for item_id, geo_id, is_proxy in zip(item_ids, geo_ids, proxy_flags)
+        for (scheme_id, ic_id, stage_id), base_value in base_values.items()
+    }
 
-    for item_id, geo_id, is_proxy in zip(item_ids, geo_ids, proxy_flags):
-        for scheme_id in scheme_ids:
-            for ic_id in impact_categories:
-                for stage_id in stages:
-                    if is_proxy:
-                        # Inflate proxy values
-                        weighted_value = 100000.0 + ic_id * stage_id * (scheme_id % 2 + 1)
-                    else:
-                        weighted_value = 10 * ic_id * stage_id * (scheme_id % 2 + 1)
-                        ic_values[ic_id].append(weighted_value)
-                        lc_values[stage_id].append(weighted_value)
-
-                    weighted_results[(item_id, geo_id, ic_id, stage_id, scheme_id)] = weighted_value
-
-    ic_mins = {ic_id: min(values) for ic_id, values in ic_values.items() if values}
-    ic_maxs = {ic_id: max(values) for ic_id, values in ic_values.items() if values}
-    lc_mins = {stage_id: min(values) for stage_id, values in lc_values.items() if values}
-    lc_maxs = {stage_id: max(values) for stage_id, values in lc_values.items() if values}
+    # Every non-proxy item shares the same values, so one pass over them yields the min/max
+    ic_mins, ic_maxs, lc_mins, lc_maxs = {}, {}, {}, {}
+    if not all(is_proxy for _, _, is_proxy in zip(item_ids, geo_ids, proxy_flags)):
+        for (scheme_id, ic_id, stage_id), base_value in base_values.items():
+            weighted_value = 10 * base_value
+            ic_mins[ic_id] = min(ic_mins.get(ic_id, weighted_value), weighted_value)
+            ic_maxs[ic_id] = max(ic_maxs.get(ic_id, weighted_value), weighted_value)
+            lc_mins[stage_id] = min(lc_mins.get(stage_id, weighted_value), weighted_value)
+            lc_maxs[stage_id] = max(lc_maxs.get(stage_id, weighted_value), weighted_value)
 
     return weighted_results, ic_mins, ic_maxs, lc_mins, lc_maxs
 
 
-def populate_weighted_results(
-        session, weighted_results
-):
-    results = [models.WeightedResults(
-        item_id=key[0], geo_id=key[1], ic_id=key[2], lc_stage_id=key[3], scheme_id=key[4], weighted_value=value
-    ) for key, value in weighted_results.items()]
-    session.add_all(
-        results
-    )
+def weighted_result_rows(weighted_results):
+    results = [{
+        "item_id": key[0], "geo_id": key[1], "ic_id": key[2], "lc_stage_id": key[3], "scheme_id": key[4],
+        "weighted_value": value
+    } for key, value in weighted_results.items()]
+    return results
 
 
 def create_normalized_lcia_values(item_ids, geo_ids, stages, impact_categories):
-    normalized_lcia_values = {}
-    for item_id in item_ids:
-        for geo_id in geo_ids:
-            for stage_id in stages:
-                for ic_id in impact_categories:
-                    # Predictable values for testing
-                    normalized_value = 10 + ic_id * 0.1 + stage_id
-                    non_normalized_value = normalized_value * 2
-                    key = (item_id, geo_id, stage_id, ic_id)
-                    normalized_lcia_values[key] = {
-                        'normalized_lcia_value': normalized_value,
-                        'non_normalized_lcia_value': non_normalized_value
-                    }
+    # Predictable values for testing, depending only on the stage and category
+    values_by_stage_and_category = {
+        (stage_id, ic_id): {
+            'normalized_lcia_value': 10 + ic_id * 0.1 + stage_id,
+            'non_normalized_lcia_value': (10 + ic_id * 0.1 + stage_id) * 2
+        }
+        for stage_id, ic_id in product(stages, impact_categories)
+    }
+    # Items and geographies share the read-only value dicts instead of each holding a copy
+    normalized_lcia_values = {
+        (item_id, geo_id, stage_id, ic_id): values
+        for item_id, geo_id in product(item_ids, geo_ids)
+        for (stage_id, ic_id), values in values_by_stage_and_category.items()
+    }
     return normalized_lcia_values
 
 
-def populate_normalized_lcia_values(session, normalized_lcia_values):
-    entries = []
-    for (item_id, geo_id, stage_id, ic_id), values in normalized_lcia_values.items():
-        entry = models.NormalizedLCIAValues(
-            item_id=item_id,
-            geo_id=geo_id,
-            ic_id=ic_id,
-            lc_stage_id=stage_id,
-            normalized_lcia_value=values['normalized_lcia_value'],
-            non_normalized_lcia_value=values['non_normalized_lcia_value']
-        )
-        entries.append(entry)
-    session.add_all(entries)
+def normalized_lcia_value_rows(normalized_lcia_values):
+    entries = [
+        {
+            "item_id": item_id,
+            "geo_id": geo_id,
+            "ic_id": ic_id,
+            "lc_stage_id": stage_id,
+            **values
+        }
+        for (item_id, geo_id, stage_id, ic_id), values in normalized_lcia_values.items()
+    ]
+    return entries
 
 
 def setup_test_data():
@@ -357,53 +354,94 @@ def setup_test_data():
 
 
 @pytest.fixture(
-    scope="module"
+    scope="session"
 )
-def test_db():
-    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+def valid_data():
+    return setup_test_data()
+
+
+def create_memory_engine():
+    # A single shared connection keeps the in-memory database visible to the TestClient's threads
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        # Test data is throwaway, so skip durability and locking work on every insert
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA journal_mode=MEMORY")
+        cursor.execute("PRAGMA locking_mode=EXCLUSIVE")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+    return engine
+
+
+@pytest.fixture(
+    scope="session"
+)
+def template_db(valid_data):
+    """
+    Build and populate the test database once per test session.
+
+    Test modules never use it directly, they each get a copy through `test_db`.
+    """
+    engine = create_memory_engine()
     SQLModel.metadata.create_all(engine)
 
-    with Session(engine) as session:
-        # Populate the database with the necessary data
-        data = setup_test_data()
-        populate_geographies(session, data["geographies"])
-        populate_groups(session, data["group_ids"])
-        populate_subgroups(session, data["subgroup_ids"])
-        populate_life_cycle_stages(session, data["stages"])
-        populate_impact_categories(session, data["impact_categories"])
-        populate_metadata(session, data["item_ids"], data["geo_ids"],data["proxy_flags"])
-        populate_weighting_schemes(session, data["weighting_names"])
-        populate_single_scores(session, data["single_scores"])
-        populate_weighted_results(session, data["weighted_results"])
-        populate_impact_category_weights(session, data["weighting_scheme_name"])
-        populate_normalized_lcia_values(session, data["normalized_lcias"])
-
-        session.commit()
-        yield session
+    data = valid_data
+    tables = [
+        (models.Geographies, geography_rows(data["geographies"])),
+        (models.Groups, group_rows(data["group_ids"])),
+        (models.Subgroups, subgroup_rows(data["subgroup_ids"])),
+        (models.LifeCycleStages, life_cycle_stage_rows(data["stages"])),
+        (models.ImpactCategories, impact_category_rows(data["impact_categories"])),
+        (models.MetaData, metadata_rows(data["item_ids"], data["geo_ids"], data["proxy_flags"])),
+        (models.WeightingSchemes, weighting_scheme_rows(data["weighting_names"])),
+        (models.SingleScores, single_score_rows(data["single_scores"])),
+        (models.WeightedResults, weighted_result_rows(data["weighted_results"])),
+        (models.ImpactCategoryWeights, impact_category_weight_rows(data["weighting_scheme_name"])),
+        (models.NormalizedLCIAValues, normalized_lcia_value_rows(data["normalized_lcias"])),
+    ]
+
+    # All tables are populated in one explicit transaction, committed when the block exits
+    with Session(engine) as session, session.begin():
+        for model, rows in tables:
+            bulk_insert(session, model, rows)
+
+    yield engine
+    engine.dispose()
 
 
 @pytest.fixture(
     scope="module"
 )
-def valid_data():
-    return setup_test_data()
+def test_db(template_db):
+    # Each module gets its own copy of the template, copied page by page by sqlite3 instead of re-inserted,
+    # so changes made by one module never reach the next
+    engine = create_memory_engine()
+    template_connection = template_db.raw_connection()
+    connection = engine.raw_connection()
+    try:
+        template_connection.driver_connection.backup(connection.driver_connection)
+    finally:
+        connection.close()
+        template_connection.close()
+
+    # Objects loaded by one test stay usable after a commit instead of being re-selected attribute by attribute
+    with Session(engine, expire_on_commit=False) as session:
+        yield session
+    engine.dispose()
 
 
 @pytest.fixture(scope="module")
 def test_client(test_db):
-    # Create a new override for `database.get_session` that yields the `test_db` session
-    def override_get_session():
-        yield test_db
-
-    # Apply the override to the FastAPI app for `database.get_session` first
-    app.dependency_overrides[database.get_session] = override_get_session
-
-    # Now apply the `dependencies._get_db_session` that depends on `database.get_session`
-    def override_get_db_session(session: Session = test_db):
-        return session
-
-    # Override the FastAPI app dependency
-    app.dependency_overrides[dependencies._get_db_session] = override_get_db_session
+    # Override `database.get_session` to return the module's `test_db` session; a plain function rather than a
+    # generator, as there is nothing to clean up per request. `dependencies._get_db_session` depends on it,
+    # so it resolves to the same session
+    app.dependency_overrides[database.get_session] = lambda: test_db
 
     # Create and yield the TestClient
     with TestClient(app) as client:
@@ -18,8 +18,6 @@ def test_fetch_lci_items_endpoint(test_client, valid_data):
         },
         "weighting_scheme_name": "ef31_r0510"
     }
-    openapi_schema = get_openapi(title="Test API", version="1.0.0", routes=app.routes)
-    print("OpenAPI Schema:", openapi_schema)
     # Make the POST request to the endpoint
     response = test_client.post("/fetch-lci-items/", json=input_data)
     print(response.json())
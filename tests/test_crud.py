@@ -10,6 +10,7 @@ from API import (
     schemas,
     exceptions,
     )
+from API.crud_optimizations import bulk_fetch_single_scores
 
 
 
@@ -24,9 +25,9 @@ def test_get_min_max_values_excludes_proxies_single_scores(test_db, valid_data):
     scheme_id = schemas.WeightingSchemeID(1)
 
     # Filter valid_data to simulate expected results for single scores
-    non_proxy_item_ids = [
+    non_proxy_item_ids = {
         item_id for item_id, is_proxy in zip(valid_data["item_ids"], valid_data["proxy_flags"]) if not is_proxy
-    ]
+    }
 
     # Calculate expected single score min and max for non-proxy items
     relevant_single_scores = [
@@ -81,6 +82,12 @@ def test_retrieve_all_data(test_db, valid_data):
     item_id = valid_data["item_ids"][0]
     geo_id = valid_data["geo_ids"][0]
 
+    # Validate each ID schema once instead of on every loop iteration
+    item_id_schema = schemas.ItemID.get(item_id)
+    geo_id_schema = schemas.GeoID.get(geo_id)
+    stage_id_schemas = {stage_id: schemas.LCStageID.get(stage_id) for stage_id in valid_data["stages"]}
+    ic_id_schemas = {ic_id: schemas.ImpactCategoryID.get(ic_id) for ic_id in valid_data["impact_categories"]}
+
     for stage_id in valid_data["stages"]:
         for ic_id in valid_data["impact_categories"]:
             key = (item_id, geo_id, stage_id, ic_id)
@@ -88,10 +95,10 @@ def test_retrieve_all_data(test_db, valid_data):
                 # Test for successful data retrieval
                 lcia_value = crud.get_lci_by_key_stage_category(
                     session=test_db,
-                    item_id=schemas.ItemID(item_id=item_id),
-                    stage_id=schemas.LCStageID(lc_stage_id=stage_id),
-                    impact_category_id=schemas.ImpactCategoryID(ic_id=ic_id),
-                    geo_id=schemas.GeoID(geo_id)
+                    item_id=item_id_schema,
+                    stage_id=stage_id_schemas[stage_id],
+                    impact_category_id=ic_id_schemas[ic_id],
+                    geo_id=geo_id_schema
                     )
                 # Check if the key exists in the valid_data dictionary
                 if key not in valid_data["normalized_lcias"]:
@@ -231,6 +238,27 @@ def test_get_ic_weights_by_scheme_id_failure_no_weights(test_db):
 
 
 
+def test_bulk_fetch_single_scores_matches_item_geo_pairs(test_db, valid_data):
+    """
+    Test that `bulk_fetch_single_scores` returns one score per requested (item_id, geo_id) pair,
+    and reports a pair whose item and geography only exist in other combinations as missing.
+    """
+    scheme_id = valid_data["scheme_ids"][0]
+    pairs = list(zip(valid_data["item_ids"], valid_data["geo_ids"]))[:2]
+    items = [(schemas.ItemID(item_id), schemas.GeoID(geo_id)) for item_id, geo_id in pairs]
+
+    # Duplicate requests are fetched once
+    single_scores = bulk_fetch_single_scores(test_db, items + items[:1], schemas.WeightingSchemeID(scheme_id))
+
+    assert set(single_scores) == set(pairs)
+    for item_id, geo_id in pairs:
+        assert single_scores[(item_id, geo_id)].lcia_value == valid_data["single_scores"][(item_id, geo_id, scheme_id)]
+
+    crossed_item = (schemas.ItemID(pairs[0][0]), schemas.GeoID(pairs[1][1]))
+    with pytest.raises(exceptions.MultipleMissingLCIAValueErrors):
+        bulk_fetch_single_scores(test_db, [items[0], crossed_item], schemas.WeightingSchemeID(scheme_id))
+
+
 @pytest.mark.usefixtures("valid_data")
 def test_fetch_results(test_db, valid_data):
     """
@@ -313,13 +341,14 @@ def test_get_all_min_max_values(test_db, valid_data):
     )
 
     # Filter the expected single scores for the specific scheme_id
-    expected_single_scores_for_scheme = {
-        key: value for key, value in valid_data["single_scores"].items() if key[2] == scheme_id.scheme_id
-    }
+    expected_single_scores_for_scheme = [
+        value for (_, _, key_scheme_id), value in valid_data["single_scores"].items()
+        if key_scheme_id == scheme_id.scheme_id
+    ]
 
     # Validate single score min and max values
-    expected_single_score_max = max(expected_single_scores_for_scheme.values())
-    expected_single_score_min = min(expected_single_scores_for_scheme.values())
+    expected_single_score_max = max(expected_single_scores_for_scheme)
+    expected_single_score_min = min(expected_single_scores_for_scheme)
 
     assert min_max_values.single_score_max.lcia_value == expected_single_score_max, \
         "Single score max value does not match expected value"
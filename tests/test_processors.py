@@ -1,6 +1,15 @@
 import pytest
-from API import schemas
-from API.processors import apply_grading_scheme
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from API import schemas, processors_optimized
+from API.processors import apply_grading_scheme, calculate_recipe
+from API.processors_optimized import (
+    apply_grading_scheme_bulk,
+    calculate_recipe_bulk,
+    clear_min_max_values_cache,
+    get_min_max_values_optimized,
+    process_input_data_optimized,
+)
 
 
 def test_apply_grading_scheme(valid_data):
@@ -13,30 +22,45 @@ def test_apply_grading_scheme(valid_data):
     min_max_values = data["min_max_values"]
     single_score_min = schemas.LCIAValue(min_max_values["single_score_min"])  # Positional initialization
     single_score_max = schemas.LCIAValue(min_max_values["single_score_max"])
-    ic_mins = {schemas.ImpactCategoryID(ic_id): schemas.LCIAValue(value) for ic_id, value in min_max_values["ic_mins"].items()}
-    ic_maxs = {schemas.ImpactCategoryID(ic_id): schemas.LCIAValue(value) for ic_id, value in min_max_values["ic_maxs"].items()}
-    lc_mins = {schemas.LCStageID(stage_id): schemas.LCIAValue(value) for stage_id, value in min_max_values["lc_mins"].items()}
-    lc_maxs = {schemas.LCStageID(stage_id): schemas.LCIAValue(value) for stage_id, value in min_max_values["lc_maxs"].items()}
+    ic_mins = {schemas.ImpactCategoryID.get(ic_id): schemas.LCIAValue(value) for ic_id, value in min_max_values["ic_mins"].items()}
+    ic_maxs = {schemas.ImpactCategoryID.get(ic_id): schemas.LCIAValue(value) for ic_id, value in min_max_values["ic_maxs"].items()}
+    lc_mins = {schemas.LCStageID.get(stage_id): schemas.LCIAValue(value) for stage_id, value in min_max_values["lc_mins"].items()}
+    lc_maxs = {schemas.LCStageID.get(stage_id): schemas.LCIAValue(value) for stage_id, value in min_max_values["lc_maxs"].items()}
+
+    # Prepare MinMaxValues schema
+    min_max_values_schema = schemas.MinMaxValues(
+        scheme_id=scheme_id,
+        single_score_min=single_score_min,
+        single_score_max=single_score_max,
+        ic_mins=ic_mins,
+        ic_maxs=ic_maxs,
+        lc_mins=lc_mins,
+        lc_maxs=lc_maxs,
+    )
+
+    # The stage and impact category IDs are the same for every item, so build them once
+    scheme = data["scheme_ids"][0]
+    weighted_results = data["weighted_results"]
+    stage_ids = [(stage_id, schemas.LCStageID.get(stage_id)) for stage_id in data["stages"]]
+    ic_ids = [(ic_id, schemas.ImpactCategoryID.get(ic_id)) for ic_id in data["impact_categories"]]
+    first_stage, first_ic = data["stages"][0], data["impact_categories"][0]
+    ic_normalization = {stage_id_schema: 1 for _, stage_id_schema in stage_ids}
+    lc_normalization = {ic_id_schema: 1 for _, ic_id_schema in ic_ids}
 
     # Iterate through all items
     for item_id, geo_id, proxy_flag in zip(data["item_ids"], data["geo_ids"], data["proxy_flags"]):
         item_id_schema = schemas.ItemID(item_id)  # Positional initialization for ItemID
         geo_id_schema = schemas.GeoID(geo_id)  # Positional initialization for GeoID
-        single_score = schemas.LCIAValue(data["single_scores"][(item_id, geo_id, data["scheme_ids"][0])])
-        weighted_results = data["weighted_results"]
+        single_score = schemas.LCIAValue(data["single_scores"][(item_id, geo_id, scheme)])
 
         # LCIA values for stages and impact categories from weighted_results
         stage_values = {
-            schemas.LCStageID(stage_id): schemas.LCIAValue(
-                weighted_results[(item_id, geo_id, data["impact_categories"][0], stage_id, data["scheme_ids"][0])]
-            )
-            for stage_id in data["stages"]
+            stage_id_schema: schemas.LCIAValue(weighted_results[(item_id, geo_id, first_ic, stage_id, scheme)])
+            for stage_id, stage_id_schema in stage_ids
         }
         impact_category_values = {
-            schemas.ImpactCategoryID(ic_id): schemas.LCIAValue(
-                weighted_results[(item_id, geo_id, ic_id, data["stages"][0], data["scheme_ids"][0])]
-            )
-            for ic_id in data["impact_categories"]
+            ic_id_schema: schemas.LCIAValue(weighted_results[(item_id, geo_id, ic_id, first_stage, scheme)])
+            for ic_id, ic_id_schema in ic_ids
         }
 
         # Create LCIAResult for the current item
@@ -47,19 +71,8 @@ def test_apply_grading_scheme(valid_data):
             single_score=single_score,
             stage_values=stage_values,
             impact_category_values=impact_category_values,
-            ic_normalization={schemas.LCStageID(stage_id): 1 for stage_id in data["stages"]},
-            lc_normalization={schemas.ImpactCategoryID(ic_id): 1 for ic_id in data["impact_categories"]},
-        )
-
-        # Prepare MinMaxValues schema
-        min_max_values_schema = schemas.MinMaxValues(
-            scheme_id=scheme_id,
-            single_score_min=single_score_min,
-            single_score_max=single_score_max,
-            ic_mins=ic_mins,
-            ic_maxs=ic_maxs,
-            lc_mins=lc_mins,
-            lc_maxs=lc_maxs,
+            ic_normalization=ic_normalization,
+            lc_normalization=lc_normalization,
         )
 
         # Act
@@ -116,3 +129,170 @@ def test_apply_grading_scheme(valid_data):
 
             # Ensure the lcia_value is unchanged
             assert ic_value.lcia_value == original_value
+
+
+def test_apply_grading_scheme_bulk_matches_original(valid_data):
+    """
+    Test that apply_grading_scheme_bulk grades every result exactly like apply_grading_scheme.
+    """
+    # Arrange
+    data = valid_data
+    scheme = data["scheme_ids"][0]
+    min_max_values = data["min_max_values"]
+    min_max_values_schema = schemas.MinMaxValues(
+        scheme_id=schemas.WeightingSchemeID(scheme),
+        single_score_min=schemas.LCIAValue(min_max_values["single_score_min"]),
+        single_score_max=schemas.LCIAValue(min_max_values["single_score_max"]),
+        ic_mins={schemas.ImpactCategoryID.get(ic_id): schemas.LCIAValue(value) for ic_id, value in min_max_values["ic_mins"].items()},
+        ic_maxs={schemas.ImpactCategoryID.get(ic_id): schemas.LCIAValue(value) for ic_id, value in min_max_values["ic_maxs"].items()},
+        lc_mins={schemas.LCStageID.get(stage_id): schemas.LCIAValue(value) for stage_id, value in min_max_values["lc_mins"].items()},
+        lc_maxs={schemas.LCStageID.get(stage_id): schemas.LCIAValue(value) for stage_id, value in min_max_values["lc_maxs"].items()},
+    )
+    weighted_results = data["weighted_results"]
+    stage_ids = [(stage_id, schemas.LCStageID.get(stage_id)) for stage_id in data["stages"]]
+    ic_ids = [(ic_id, schemas.ImpactCategoryID.get(ic_id)) for ic_id in data["impact_categories"]]
+    first_stage, first_ic = data["stages"][0], data["impact_categories"][0]
+    lcia_results = [
+        schemas.LCIAResult(
+            item_id=schemas.ItemID(item_id),
+            geo_id=schemas.GeoID(geo_id),
+            proxy_flag=proxy_flag,
+            single_score=schemas.LCIAValue(data["single_scores"][(item_id, geo_id, scheme)]),
+            stage_values={
+                stage_id_schema: schemas.LCIAValue(weighted_results[(item_id, geo_id, first_ic, stage_id, scheme)])
+                for stage_id, stage_id_schema in stage_ids
+            },
+            impact_category_values={
+                ic_id_schema: schemas.LCIAValue(weighted_results[(item_id, geo_id, ic_id, first_stage, scheme)])
+                for ic_id, ic_id_schema in ic_ids
+            },
+            ic_normalization={stage_id_schema: 1 for _, stage_id_schema in stage_ids},
+            lc_normalization={ic_id_schema: 1 for _, ic_id_schema in ic_ids},
+        )
+        for item_id, geo_id, proxy_flag in zip(data["item_ids"], data["geo_ids"], data["proxy_flags"])
+    ]
+
+    # Act
+    expected_results = [apply_grading_scheme(lcia_result, min_max_values_schema) for lcia_result in lcia_results]
+    bulk_results = apply_grading_scheme_bulk(lcia_results, min_max_values_schema)
+
+    # Assert
+    assert len(bulk_results) == len(expected_results)
+    for bulk_result, expected_result in zip(bulk_results, expected_results):
+        assert bulk_result.item_id == expected_result.item_id
+        assert bulk_result.geo_id == expected_result.geo_id
+        assert bulk_result.proxy_flag == expected_result.proxy_flag
+        assert bulk_result.single_score == expected_result.single_score
+        assert bulk_result.stage_values == expected_result.stage_values
+        assert bulk_result.impact_category_values == expected_result.impact_category_values
+
+
+def test_calculate_recipe_bulk_matches_original(valid_data):
+    """
+    Test that calculate_recipe_bulk aggregates graded results exactly like calculate_recipe.
+    """
+    # Arrange
+    data = valid_data
+    scheme = data["scheme_ids"][0]
+    weighted_results = data["weighted_results"]
+    first_stage, first_ic = data["stages"][0], data["impact_categories"][0]
+
+    def graded_value(lcia_value, scaled_value):
+        return schemas.GradedLCIAValue(
+            lcia_value=lcia_value,
+            scaled_value=scaled_value,
+            grade=schemas.GradedLCIAValue.assign_grade(scaled_value)
+        )
+
+    graded_results = [
+        schemas.GradedLCIAResult(
+            item_id=schemas.ItemID(item_id),
+            geo_id=schemas.GeoID(geo_id),
+            single_score=graded_value(data["single_scores"][(item_id, geo_id, scheme)], 0.1 * (index % 10)),
+            # Fresh, equal ID models per item, as the aggregation must not rely on shared instances
+            stage_values={
+                schemas.LCStageID(stage_id): graded_value(
+                    weighted_results[(item_id, geo_id, first_ic, stage_id, scheme)], 0.05 * ((index + stage_id) % 20)
+                )
+                for stage_id in data["stages"]
+            },
+            impact_category_values={
+                schemas.ImpactCategoryID(ic_id): graded_value(
+                    weighted_results[(item_id, geo_id, ic_id, first_stage, scheme)], 0.05 * ((index + ic_id) % 20)
+                )
+                for ic_id in data["impact_categories"]
+            },
+        )
+        for index, (item_id, geo_id) in enumerate(zip(data["item_ids"], data["geo_ids"]))
+    ]
+
+    # Act
+    expected_result = calculate_recipe(graded_results)
+    bulk_result = calculate_recipe_bulk(graded_results)
+
+    # Assert
+    assert bulk_result.single_score == expected_result.single_score
+    assert list(bulk_result.stage_values.items()) == list(expected_result.stage_values.items())
+    assert list(bulk_result.impact_category_values.items()) == list(expected_result.impact_category_values.items())
+
+
+def test_get_min_max_values_optimized_is_cached(test_db, valid_data):
+    """
+    Test that repeated min/max lookups for the same scheme are served from the cache until it is cleared,
+    without callers being able to change the cached values.
+    """
+    # Arrange
+    clear_min_max_values_cache()
+    scheme_id = schemas.WeightingSchemeID(valid_data["scheme_ids"][0])
+    impact_categories = [schemas.ImpactCategoryID.get(ic_id) for ic_id in valid_data["impact_categories"]]
+    lc_stages = [schemas.LCStageID.get(stage_id) for stage_id in valid_data["stages"]]
+
+    # Act
+    first = get_min_max_values_optimized(test_db, scheme_id, impact_categories, lc_stages)
+    first.ic_mins.clear()
+    reordered = get_min_max_values_optimized(test_db, scheme_id, impact_categories[::-1], lc_stages)
+    clear_min_max_values_cache(test_db.get_bind())
+    refetched = get_min_max_values_optimized(test_db, scheme_id, impact_categories, lc_stages)
+    clear_min_max_values_cache()
+
+    # Assert
+    assert reordered is not first
+    assert reordered.single_score_min is first.single_score_min
+    assert refetched.single_score_min is not first.single_score_min
+    assert refetched == reordered
+    assert len(reordered.ic_mins) == len(impact_categories)
+    with pytest.raises(ValidationError):
+        reordered.single_score_min.lcia_value = 0.0
+
+
+def test_process_input_data_optimized_reports_unknown_country_acronym(test_db, valid_data):
+    """
+    Test that process_input_data_optimized keeps UniqueID keys and rejects acronyms without a geography.
+    """
+    unique_id = schemas.UniqueID(
+        item_id=schemas.ItemID(valid_data["item_ids"][0]),
+        geo_id=schemas.GeoID(valid_data["geo_ids"][0]),
+        item_id_country_acronym=schemas.ItemCountryAcronym(f"{valid_data['item_ids'][0]}-FRA")
+    )
+    data = schemas.InputData(items={unique_id: 0.5}, weighting_scheme_name="ef31_r0510")
+    process_input_data_optimized(data, test_db)
+    assert list(data.items) == [unique_id]
+
+    data = schemas.InputData(
+        items={unique_id: 0.5, f"{valid_data['item_ids'][1]}-ZZZ": 0.5}, weighting_scheme_name="ef31_r0510"
+    )
+    with pytest.raises(ValueError, match="Invalid country acronym: ZZZ"):
+        process_input_data_optimized(data, test_db)
+
+
+def test_process_input_data_optimized_reports_failed_lookup_as_country_acronym(test_db, valid_data, monkeypatch):
+    """
+    Test that a failing geo_id lookup is reported as an unresolvable country acronym, like the original.
+    """
+    def failing_lookup(session, country_acronyms):
+        raise SQLAlchemyError("database is locked")
+
+    monkeypatch.setattr(processors_optimized, "bulk_fetch_geo_ids", failing_lookup)
+    data = schemas.InputData(items={f"{valid_data['item_ids'][0]}-FRA": 0.5}, weighting_scheme_name="ef31_r0510")
+    with pytest.raises(ValueError, match="Invalid country acronym: FRA. Could not resolve to a geo_id."):
+        process_input_data_optimized(data, test_db)
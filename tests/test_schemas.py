@@ -40,6 +40,18 @@ def test_geo_id_invalid_range():
     assert "GeoID must be between 1 and 249" in str(exc_info.value)
 
 
+def test_id_get_returns_shared_validated_instance():
+    """
+    Test that `get` interns ID instances per class and still validates new values.
+    """
+    stage_id = schemas.LCStageID.get(3)
+    assert stage_id is schemas.LCStageID.get(3)
+    assert stage_id == schemas.LCStageID(3)
+    assert schemas.ImpactCategoryID.get(3) is not stage_id
+    with pytest.raises(ValidationError):
+        schemas.LCStageID.get(7)
+
+
 def test_input_data_valid():
     """
     Test valid input data with weighting_scheme_name and valid items.
@@ -294,10 +306,17 @@ def test_output_data_serialization():
         stage_names={},
         impact_category_names={}
     )
-    # Adjusted test to expect an AttributeError due to current schema implementation
-    with pytest.raises(AttributeError) as exc_info:
-        serialized = output_data.model_dump()
-    assert "'str' object has no attribute 'item_id_country_acronym'" in str(exc_info.value)
+    serialized = output_data.model_dump()
+    assert serialized["Recipe Info"]["General Info"] == {
+        "Weighting Scheme": "ef31_r0510",
+        "contains_proxy": False,
+        "Overall Mass": "1.0 kg"
+    }
+    assert serialized["Recipe Info"]["Single Score"] == {"Single Score": 50.0, "Grade": "C", "Scaled Value": 0.5}
+    assert serialized["Recipe Info"]["Items"] == {"76101-FRA": "0.5 kg", "76102-FRA": "0.5 kg"}
+    assert serialized["Recipe Info"]["Stages"] == {}
+    assert serialized["Recipe Info"]["Impact Categories"] == {}
+    assert serialized["Item Results"] == {}
 
 
 def test_graded_lcia_value_grade_assignment():